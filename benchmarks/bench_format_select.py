@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Format selection benchmark: in-process format_plan() ranking vs the former yt-dlp
+format-string cascade, over the recorded format lists in fixtures/format_lists.json.
+
+Prints the plan each approach picks per resolution and the median time per selection.
+
+Usage: python benchmarks/bench_format_select.py [runs]
+"""
+from __future__ import annotations
+import copy
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "format_lists.json"
+sys.path.insert(0, str(ROOT))
+
+import yt_cli_downloader as ytdl  # noqa: E402
+
+def legacy_spec(res: str) -> str:
+    """The format string entry_ydl_opts() built before format_plan()"""
+    if res == "auto":
+        return "bv*+ba/b"
+    h = int(res[:-1])
+    return (f"bv*[height={h}][vcodec~='(avc1|h264)']+ba[ext=m4a]/"
+            f"bv*[height={h}]+ba/"
+            f"bv*[height<={h}][vcodec~='(avc1|h264)']+ba/"
+            f"bv*[height<={h}]+ba/"
+            f"b[height<={h}]")
+
+def legacy_plan(ydl, info: dict, res: str) -> list[dict]:
+    ydl.params["format"] = legacy_spec(res)
+    ydl.format_selector = ydl.build_format_selector(ydl.params["format"])
+    chosen = ydl.process_ie_result(copy.deepcopy(info), download=False)
+    return chosen.get("requested_formats") or [chosen]
+
+def timed(fn, runs: int) -> tuple[float, list[dict]]:
+    samples, plan = [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+        ids = [f["format_id"] for f in result]
+        if plan is not None and ids != plan:
+            raise RuntimeError(f"non-deterministic plan: {plan} then {ids}")
+        plan = ids
+    return statistics.median(samples), plan
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    import yt_dlp
+
+    ydl = yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True, "simulate": True})
+    videos = json.loads(FIXTURES.read_text(encoding="utf-8"))["videos"]
+    totals = {"legacy": 0.0, "format_plan": 0.0}
+    print(f"{'video':<30} {'res':<6} {'legacy (yt-dlp)':<24} {'format_plan':<24} {'legacy ms':>10} {'plan ms':>9}")
+    for video in videos:
+        info = {**video, "extractor": "fixture", "extractor_key": "Fixture",
+                "webpage_url": f"https://example.invalid/{video['id']}"}
+        for res in ytdl.RESOLUTIONS:
+            try:
+                old_t, old = timed(lambda: legacy_plan(ydl, info, res), runs)
+                old_ids = "+".join(old)
+            except Exception as e:  # the cascade raises when nothing matches; the SABR fallback took over
+                old_t, old_ids = 0.0, f"error: {type(e).__name__}"
+            new_t, new = timed(lambda: ytdl.format_plan(info, res), runs)
+            totals["legacy"] += old_t
+            totals["format_plan"] += new_t
+            print(f"{video['title'][:30]:<30} {res:<6} {old_ids:<24} {'+'.join(new):<24} "
+                  f"{old_t * 1000:10.3f} {new_t * 1000:9.3f}")
+    print(f"\ntotal median per pass: legacy {totals['legacy'] * 1000:.2f} ms, "
+          f"format_plan {totals['format_plan'] * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
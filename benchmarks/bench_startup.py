@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Startup-time benchmark: bare module import and launch -> first prompt.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+from __future__ import annotations
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "yt_cli_downloader.py"
+PROMPT = b"Paste YouTube URL:"
+
+def time_import() -> float:
+    t0 = time.perf_counter()
+    subprocess.check_call(
+        [sys.executable, "-c", "import yt_cli_downloader"],
+        cwd=SCRIPT.parent,
+    )
+    return time.perf_counter() - t0
+
+def time_first_prompt() -> float:
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-u", str(SCRIPT)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=dict(os.environ, PYTHONIOENCODING="utf-8"),
+    )
+    seen = b""
+    try:
+        while PROMPT not in seen:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError("process exited before showing the first prompt")
+            seen += chunk
+        return time.perf_counter() - t0
+    finally:
+        proc.kill()
+        proc.wait()
+
+def report(name: str, samples: list[float]) -> None:
+    print(f"{name:<22} median {statistics.median(samples) * 1000:8.1f} ms"
+          f"   min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms")
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Warm-up run also primes the update-check stamp and ffmpeg lookup
+    time_first_prompt()
+    report("import", [time_import() for _ in range(runs)])
+    report("launch -> first prompt", [time_first_prompt() for _ in range(runs)])
+
+if __name__ == "__main__":
+    main()
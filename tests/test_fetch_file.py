@@ -0,0 +1,142 @@
+"""fetch_file() resume/checksum and extract_members() against a local Range-capable server.
+
+Usage: python -m unittest discover tests
+"""
+from __future__ import annotations
+import hashlib
+import http.server
+import io
+import sys
+import tarfile
+import tempfile
+import threading
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yt_cli_downloader as ytdl  # noqa: E402
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MiB
+
+class FlakyRangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves PAYLOAD with Range support; the first full response dies halfway through"""
+    body = PAYLOAD
+    dropped = False
+    ranges: list[str | None] = []
+
+    def do_GET(self):
+        cls = type(self)
+        rng = self.headers.get("Range")
+        cls.ranges.append(rng)
+        start = int(rng[len("bytes="):].split("-")[0]) if rng else 0
+        if start >= len(cls.body):
+            self.send_response(416)
+            self.end_headers()
+            return
+        data = cls.body[start:]
+        self.send_response(206 if rng else 200)
+        self.send_header("Content-Length", str(len(data)))
+        if rng:
+            self.send_header("Content-Range", f"bytes {start}-{len(cls.body) - 1}/{len(cls.body)}")
+        self.end_headers()
+        if not rng and not cls.dropped:
+            cls.dropped = True
+            self.wfile.write(data[:len(data) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class FetchFileTest(unittest.TestCase):
+    def setUp(self):
+        FlakyRangeHandler.body, FlakyRangeHandler.dropped, FlakyRangeHandler.ranges = PAYLOAD, False, []
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FlakyRangeHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ffmpeg.tar.xz"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        sleep = mock.patch.object(ytdl.time, "sleep")  # skip the retry back-off
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_resumes_after_dropped_response(self):
+        dest = self.dir / "out.bin"
+        ytdl.fetch_file(self.url, dest, hashlib.sha256(PAYLOAD).hexdigest(), chunk_size=64 * 1024)
+        self.assertEqual(dest.read_bytes(), PAYLOAD)
+        self.assertFalse(dest.with_name("out.bin.part").exists())
+        self.assertEqual(FlakyRangeHandler.ranges[0], None)
+        self.assertEqual(len(FlakyRangeHandler.ranges), 2)
+        self.assertEqual(FlakyRangeHandler.ranges[1], f"bytes={len(PAYLOAD) // 2}-")
+
+    def test_complete_part_file_is_kept(self):
+        dest = self.dir / "out.bin"
+        dest.with_name("out.bin.part").write_bytes(PAYLOAD)
+        ytdl.fetch_file(self.url, dest, hashlib.md5(PAYLOAD).hexdigest(), algo="md5")
+        self.assertEqual(dest.read_bytes(), PAYLOAD)
+        self.assertEqual(FlakyRangeHandler.ranges, [f"bytes={len(PAYLOAD)}-"])
+
+    def test_checksum_mismatch(self):
+        dest = self.dir / "out.bin"
+        with self.assertRaises(ValueError):
+            ytdl.fetch_file(self.url, dest, "0" * 64)
+        self.assertFalse(dest.exists())
+        self.assertFalse(dest.with_name("out.bin.part").exists())
+
+    def test_install_refuses_unverified_build(self):
+        bin_dir = self.dir / "bin"
+        with mock.patch.dict(ytdl.os.environ, {"YTDL_FFMPEG_URL": self.url}), \
+                mock.patch.object(ytdl, "BIN_DIR", bin_dir):
+            ytdl.os.environ.pop("YTDL_FFMPEG_SHA256", None)
+            with self.assertRaises(ValueError):
+                ytdl.install_static_ffmpeg("Linux")
+        self.assertEqual(FlakyRangeHandler.ranges, [])
+        self.assertFalse(bin_dir.exists())
+
+class ExtractMembersTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.members = {"ffmpeg-7.0-static/ffmpeg": b"ffmpeg", "ffmpeg-7.0-static/ffprobe": b"ffprobe",
+                        "ffmpeg-7.0-static/readme.txt": b"readme"}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check(self, archive: Path):
+        out = self.dir / "bin"
+        out.mkdir()
+        extracted = ytdl.extract_members(archive, ["ffmpeg", "ffprobe"], out)
+        self.assertEqual(sorted(p.name for p in extracted), ["ffmpeg", "ffprobe"])
+        self.assertEqual(sorted(p.name for p in out.iterdir()), ["ffmpeg", "ffprobe"])
+        self.assertEqual((out / "ffprobe").read_bytes(), b"ffprobe")
+        self.assertTrue((out / "ffmpeg").stat().st_mode & 0o100)
+
+    def test_tar_xz(self):
+        archive = self.dir / "ffmpeg.tar.xz"
+        with tarfile.open(archive, "w:xz") as tf:
+            for name, data in self.members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tf.addfile(info, io.BytesIO(data))
+        self.check(archive)
+
+    def test_zip(self):
+        archive = self.dir / "ffmpeg.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            for name, data in self.members.items():
+                zf.writestr(name, data)
+        self.check(archive)
+
+if __name__ == "__main__":
+    unittest.main()
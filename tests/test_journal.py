@@ -0,0 +1,57 @@
+"""JobJournal recovery from a crash that tore its last line.
+
+Usage: python -m unittest discover tests
+"""
+from __future__ import annotations
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yt_cli_downloader as ytdl  # noqa: E402
+
+class JobJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.path = self.dir / ytdl.JobJournal.FILENAME
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text: str):
+        self.path.write_text(text, encoding="utf-8")
+
+    def lines(self) -> list[dict]:
+        return [json.loads(line) for line in self.path.read_text(encoding="utf-8").splitlines()]
+
+    def test_torn_tail_is_dropped_before_appending(self):
+        self.write(json.dumps({"job": "j", "key": "a", "state": "downloading"}) + "\n"
+                   + '{"job": "j", "key": "b", "sta')
+        journal = ytdl.JobJournal(self.dir, "j")
+        self.assertEqual(journal.previous, {"a": "downloading"})
+        journal.mark("b", "extracting")
+        journal.close()
+        self.assertEqual([(r["key"], r["state"]) for r in self.lines()], [("a", "downloading"), ("b", "extracting")])
+
+    def test_missing_final_newline(self):
+        self.write(json.dumps({"job": "j", "key": "a", "state": "done"}))
+        journal = ytdl.JobJournal(self.dir, "j")
+        journal.mark("b", "queued")
+        journal.close()
+        self.assertEqual([r["key"] for r in self.lines()], ["a", "b"])
+
+    def test_finished_jobs_are_compacted(self):
+        self.write("".join(json.dumps(r) + "\n" for r in [
+            {"job": "old", "key": "a", "state": "done"}, {"job": "old", "key": None, "state": "finished"},
+            {"job": "j", "key": "b", "state": "post-processing"}]))
+        journal = ytdl.JobJournal(self.dir, "j")
+        journal.close()
+        self.assertEqual(journal.previous, {"b": "post-processing"})
+        self.assertEqual([r["job"] for r in self.lines()], ["j"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Clip manifest parsing: playlist context is stripped so each row is keyed by its own video.
+
+Usage: python -m unittest discover tests
+"""
+from __future__ import annotations
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yt_cli_downloader as ytdl  # noqa: E402
+
+class SingleVideoUrlTest(unittest.TestCase):
+    def test_strips_playlist_context(self):
+        self.assertEqual(ytdl.single_video_url("https://www.youtube.com/watch?v=A&list=PLx&index=3&pp=iAQB"),
+                         "https://www.youtube.com/watch?v=A")
+        self.assertEqual(ytdl.single_video_url("https://youtu.be/A?list=PLx&t=5"), "https://youtu.be/A?t=5")
+        self.assertEqual(ytdl.single_video_url("https://www.youtube.com/shorts/A?list=PLx"),
+                         "https://www.youtube.com/shorts/A")
+
+    def test_plain_url_is_untouched(self):
+        url = "https://example.com/media/clip.mp4?token=1"
+        self.assertEqual(ytdl.single_video_url(url), url)
+
+    def test_playlist_only_url(self):
+        self.assertIsNone(ytdl.single_video_url("https://www.youtube.com/playlist?list=PLx"))
+        self.assertIsNone(ytdl.single_video_url("https://www.youtube.com/watch?list=PLx"))
+
+class ReadManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "clips.csv"
+        self.path.write_text("url,start,end,label\n"
+                             "https://www.youtube.com/watch?v=AAAAAAAAAAA&list=PLx,0:01,0:03,a\n"
+                             "https://www.youtube.com/watch?v=BBBBBBBBBBB&list=PLx,0:05,0:07,\n"
+                             "https://www.youtube.com/playlist?list=PLx,0:01,0:02,c\n"
+                             "https://www.youtube.com/watch?v=AAAAAAAAAAA,0:04,0:02,d\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rows(self):
+        a, b, playlist, inverted = ytdl.read_manifest(str(self.path))
+        self.assertEqual((a["status"], a["_video"]), ("pending", "https://www.youtube.com/watch?v=AAAAAAAAAAA"))
+        self.assertEqual((b["status"], b["_video"]), ("pending", "https://www.youtube.com/watch?v=BBBBBBBBBBB"))
+        self.assertEqual((a["start"], a["end"]), ("00:0:01", "00:0:03"))
+        self.assertEqual(playlist["status"], "failed")
+        self.assertIn("playlist URL", playlist["error"])
+        self.assertEqual(inverted["status"], "failed")
+
+    @unittest.skipUnless(importlib.util.find_spec("yt_dlp"), "yt-dlp not installed")
+    def test_videos_of_one_playlist_get_different_keys(self):
+        a, b, *_ = ytdl.read_manifest(str(self.path))
+        key_a, key_b = ytdl.video_cache_key(a["_video"]), ytdl.video_cache_key(b["_video"])
+        self.assertEqual(key_a, "Youtube:AAAAAAAAAAA")
+        self.assertEqual(key_b, "Youtube:BBBBBBBBBBB")
+
+if __name__ == "__main__":
+    unittest.main()
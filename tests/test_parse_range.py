@@ -0,0 +1,45 @@
+"""Time range validation for start/end and clips, in job lines and on their own.
+
+Usage: python -m unittest discover tests
+"""
+from __future__ import annotations
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yt_cli_downloader as ytdl  # noqa: E402
+
+class ParseRangeTest(unittest.TestCase):
+    def test_normalizes(self):
+        self.assertEqual(ytdl.parse_range(" 1:05", "01:02:03 "), ("00:1:05", "01:02:03"))
+        self.assertEqual(ytdl.parse_range("90", "95.5"), ("90", "95.5"))
+
+    def test_mistyped_time(self):
+        with self.assertRaisesRegex(ValueError, "MM:SS or HH:MM:SS, got '1:2x'"):
+            ytdl.parse_range("1:2x", "2:00")
+        for start, end in [("-0:05", "0:10"), ("0:00", "inf"), ("1e1", "0:20"), ("", "0:10"), ("1:2:3:4", "9:00:00:00")]:
+            with self.subTest(start=start, end=end), self.assertRaisesRegex(ValueError, "MM:SS"):
+                ytdl.parse_range(start, end)
+
+    def test_inverted_or_empty_range(self):
+        for start, end in [("2:00", "1:00"), ("1:00", "1:00"), ("0:59", "0:00:59")]:
+            with self.subTest(start=start, end=end), self.assertRaisesRegex(ValueError, "after start"):
+                ytdl.parse_range(start, end)
+
+    def test_clips(self):
+        self.assertEqual(ytdl.parse_clips("0:10-0:20, 1:05-1:30"),
+                         [("00:0:10", "00:0:20"), ("00:1:05", "00:1:30")])
+        with self.assertRaises(ValueError):
+            ytdl.parse_clips("0:10-0:20,0:30")
+
+    def test_job_line(self):
+        job = ytdl.parse_job_line("https://example.com/v start=0:10 end=0:20")
+        self.assertEqual((job.start, job.end), ("00:0:10", "00:0:20"))
+        for bad in ["start=abc end=0:20", "start=0:20 end=0:10", "start=0:10", "clips=0:20-0:10"]:
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                ytdl.parse_job_line(f"https://example.com/v {bad}")
+
+if __name__ == "__main__":
+    unittest.main()
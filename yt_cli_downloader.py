@@ -1,43 +1,269 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 import importlib
+import importlib.util
+import glob
+import json
 import os
 import platform
+import re
 import shutil
 import subprocess
 import sys
 import textwrap
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
 
 BIN_DIR = Path(__file__).resolve().parent / "bin"
+CACHE_DIR = Path(os.environ.get("YTDL_CACHE_DIR") or Path(__file__).resolve().parent / ".cache")
+UPDATE_STAMP = CACHE_DIR / "yt_dlp_update.json"
+FFMPEG_CAPS_CACHE = CACHE_DIR / "ffmpeg_caps.json"
+YDL_REUSE_CACHE = CACHE_DIR / "ydl_reuse.json"
+UPDATE_TTL = float(os.environ.get("YTDL_UPDATE_TTL", 24 * 3600))  # seconds between pip checks
+YT_DLP_PIN = os.environ.get("YTDL_PIN_VERSION", "").strip()  # e.g. "2024.08.06", empty = latest
+METADATA_DB = CACHE_DIR / "metadata.sqlite3"
+META_STABLE_TTL = float(os.environ.get("YTDL_META_TTL", 7 * 24 * 3600))  # title/duration/sizes; 0 disables the cache
+MEDIA_INDEX_TTL = float(os.environ.get("YTDL_MEDIA_INDEX_TTL", 7 * 24 * 3600))  # keyframe indexes of local files; 0 disables
+PLAYLIST_TTL = float(os.environ.get("YTDL_PLAYLIST_TTL", 3600))  # flat listings change as videos are added
+SECTION_PAD = 5.0  # seconds fetched either side of a video section so the exact cut lands inside the file
+INFO_MAX_AGE = 4 * 3600  # seconds an extracted info dict is trusted; signed stream URLs live ~6 h
+DEFAULT_WORKERS = max(1, int(os.environ.get("YTDL_WORKERS", 3)))  # parallel playlist downloads
+CLIPS_PER_FFMPEG = 16  # clips cut by one ffmpeg process; bigger lists are spread over the cut pool
+AUDIO_MAX_KBPS = int(os.environ.get("YTDL_AUDIO_MAX_KBPS", 192))  # ceiling for transcoded audio
+LADDER_BANDWIDTH = float(os.environ.get("YTDL_BANDWIDTH_MBPS", 40)) * 125_000  # bytes/s of the download link
+ENCODE_MPIXELS = float(os.environ.get("YTDL_ENCODE_MPIXELS", 0))  # encoder throughput for ladder planning, 0 = guess
+MP3_VBR = os.environ.get("YTDL_MP3_VBR", "").lower() in ("1", "true", "yes")  # LAME -V levels instead of CBR
 
-def ensure_pip_package(pkg_name: str) -> None:
+def read_json(path: Path) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def write_json_atomic(path: Path, data: dict) -> None:
+    # Write to a sibling temp file and rename so concurrent readers never see half a file
     try:
-        importlib.import_module(pkg_name.replace("-", "_"))
-    except ModuleNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+def installed_version(pkg_name: str) -> str | None:
+    import importlib.metadata  # ~70 ms; only needed when bootstrapping or updating
+
+    try:
+        return importlib.metadata.version(pkg_name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+class _NoColor:
+    """Stand-in for colorama's Fore/Style until (or unless) colorama is loaded"""
+    def __getattr__(self, name: str) -> str:
+        return ""
+
+# Heavy runtime dependencies are bound by bootstrap()/load_yt_dlp() so importing
+# this module stays side-effect free (no pip, no ffmpeg probing, no yt_dlp import).
+yt_dlp = None
+sanitize_filename = None
+Fore = Style = _NoColor()
+auto_ffmpeg: str | None = None
+_runtime_lock = threading.Lock()
+
+_ffmpeg_caps_memo: dict[str, dict] = {}
+
+# H.264 encoders, fastest first, with the arguments that give roughly libx264 -crf 18 quality
+H264_ENCODERS = {
+    "h264_nvenc": ["-preset", "p4", "-rc", "vbr", "-cq", "19", "-b:v", "0"],
+    "h264_qsv": ["-preset", "faster", "-global_quality", "20"],
+    "h264_videotoolbox": ["-q:v", "65"],
+    "h264_amf": ["-quality", "speed", "-rc", "cqp", "-qp_i", "18", "-qp_p", "20"],
+    "libx264": ["-preset", "fast", "-crf", "18"],
+    "libopenh264": ["-b:v", "8M"],
+}
+HW_ENCODERS = {"h264_nvenc", "h264_qsv", "h264_videotoolbox", "h264_amf"}
+
+def ensure_pip_package(pkg_name: str) -> None:
+    # find_spec only locates the package; actually importing yt_dlp here would cost ~0.5 s
+    if importlib.util.find_spec(pkg_name.replace("-", "_")) is None:
         print(f"\n💡 Installing Python package '{pkg_name}' …")
         subprocess.check_call([sys.executable, "-m", "ensurepip", "--upgrade"])
         subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", pkg_name])
         print(f"✅ Installed {pkg_name}\n")
 
 def update_yt_dlp() -> None:
-    """Check and update yt-dlp to latest version to avoid format issues"""
+    """Check and update yt-dlp to avoid format issues, at most once per UPDATE_TTL window"""
+    current = installed_version("yt-dlp")
+    if YT_DLP_PIN and current == YT_DLP_PIN:
+        return
+    stamp = read_json(UPDATE_STAMP)
+    fresh = time.time() - float(stamp.get("checked_at", 0)) < UPDATE_TTL
+    if fresh and stamp.get("version") == current and stamp.get("pin", "") == YT_DLP_PIN:
+        return
+    # Claim the window before running pip so jobs starting at the same time don't all upgrade
+    write_json_atomic(UPDATE_STAMP, {"checked_at": time.time(), "version": current, "pin": YT_DLP_PIN})
+    spec = f"yt-dlp=={YT_DLP_PIN}" if YT_DLP_PIN else "yt-dlp"
     try:
         print("\n💡 Checking for yt-dlp updates...")
         # Use DEVNULL to suppress output but still allow the update to proceed
         with open(os.devnull, 'w') as devnull:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "yt-dlp"], 
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", spec], 
                                 stdout=devnull, stderr=devnull)
-        print("✅ yt-dlp updated to latest version\n")
+        current = installed_version("yt-dlp")
+        print(f"✅ yt-dlp is up to date ({current})\n")
     except subprocess.CalledProcessError:
         print("⚠️ Could not update yt-dlp, continuing with current version\n")
+    write_json_atomic(UPDATE_STAMP, {"checked_at": time.time(), "version": current, "pin": YT_DLP_PIN})
+
+# Static ffmpeg builds: (archive URL, checksum URL). YTDL_FFMPEG_URL / YTDL_FFMPEG_SHA256 override.
+FFMPEG_BUILDS = {
+    ("Windows", "amd64"): ("https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip",
+                           "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip.sha256"),
+    ("Linux", "x86_64"): ("https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz",
+                          "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz.md5"),
+    ("Linux", "aarch64"): ("https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-arm64-static.tar.xz",
+                           "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-arm64-static.tar.xz.md5"),
+}
+
+def fetch_file(url: str, dest: Path, checksum: str | None = None, algo: str = "sha256",
+               chunk_size: int = 1 << 20, retries: int = 5) -> Path:
+    """Stream `url` to `dest` via a `.part` file, resuming with HTTP Range after network errors"""
+    import hashlib
+    import http.client
+    import urllib.error
+    import urllib.request
+
+    part = dest.with_name(dest.name + ".part")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    for attempt in range(retries + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        req = urllib.request.Request(url, headers={"Range": f"bytes={offset}-"} if offset else {})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                if offset and resp.status != 206:
+                    offset = 0  # server ignored the Range header, start over
+                expected = resp.headers.get("Content-Length")
+                expected = offset + int(expected) if expected is not None else None
+                with open(part, "ab" if offset else "wb") as fh:
+                    while True:
+                        chunk = resp.read(chunk_size)
+                        if not chunk:
+                            break
+                        fh.write(chunk)
+            if expected is None or part.stat().st_size >= expected:
+                break
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and offset:
+                break  # .part already holds the whole file
+            if attempt == retries or e.code < 500:
+                raise
+        except (OSError, http.client.HTTPException):
+            if attempt == retries:
+                raise
+        print(f"   → connection interrupted, resuming ({attempt + 1}/{retries}) …")
+        time.sleep(min(2 ** attempt, 30))
+    else:
+        raise OSError(f"incomplete download: {url}")
+
+    if checksum:
+        h = hashlib.new(algo)
+        with open(part, "rb") as fh:
+            for chunk in iter(lambda: fh.read(chunk_size), b""):
+                h.update(chunk)
+        if h.hexdigest().lower() != checksum.lower():
+            part.unlink()
+            raise ValueError(f"checksum mismatch for {url}")
+    os.replace(part, dest)
+    return dest
+
+def _remote_checksum(url: str) -> str | None:
+    import urllib.request
+    try:
+        with urllib.request.urlopen(url, timeout=30) as resp:
+            text = resp.read(4096).decode("ascii", "replace").split()
+        return text[0] if text else None
+    except OSError:
+        return None
+
+def extract_members(archive: Path, names: list[str], dest_dir: Path) -> list[Path]:
+    """Copy only the archive members whose basename is in `names` into `dest_dir`"""
+    import tarfile
+    import zipfile
+
+    extracted = []
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for member in zf.namelist():
+                name = member.rsplit("/", 1)[-1]
+                if name in names:
+                    with zf.open(member) as src, open(dest_dir / name, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                    extracted.append(dest_dir / name)
+    else:
+        with tarfile.open(archive, "r:*") as tf:
+            for member in tf:
+                name = member.name.rsplit("/", 1)[-1]
+                if member.isfile() and name in names:
+                    with tf.extractfile(member) as src, open(dest_dir / name, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                    extracted.append(dest_dir / name)
+    for path in extracted:
+        path.chmod(path.stat().st_mode | 0o755)
+    return extracted
+
+def install_static_ffmpeg(system: str) -> str | None:
+    """Drop a static ffmpeg (and ffprobe) build into BIN_DIR; no package manager or sudo needed"""
+    suffix = ".exe" if system == "Windows" else ""
+    exe = BIN_DIR / f"ffmpeg{suffix}"
+    if not exe.exists():
+        machine = platform.machine().lower()
+        machine = {"amd64": "x86_64", "arm64": "aarch64"}.get(machine, machine) if system != "Windows" else "amd64"
+        url, checksum_url = FFMPEG_BUILDS.get((system, machine), (None, None))
+        url = os.environ.get("YTDL_FFMPEG_URL") or url
+        if not url:
+            return None
+        checksum = os.environ.get("YTDL_FFMPEG_SHA256")
+        algo = "sha256"
+        if not checksum and checksum_url and not os.environ.get("YTDL_FFMPEG_URL"):
+            checksum = _remote_checksum(checksum_url)
+            algo = "md5" if checksum_url.endswith(".md5") else "sha256"
+        if not checksum:
+            # Never install (and later run) an unverified binary
+            raise ValueError(f"no checksum available for {url}; set YTDL_FFMPEG_SHA256 to install it")
+        archive = BIN_DIR / url.rsplit("/", 1)[-1].split("?")[0]
+        print("   → downloading static build …")
+        fetch_file(url, archive, checksum=checksum, algo=algo)
+        extract_members(archive, [f"ffmpeg{suffix}", f"ffprobe{suffix}"], BIN_DIR)
+        archive.unlink()
+        if not exe.exists():
+            return None
+    os.environ["PATH"] += os.pathsep + str(BIN_DIR)
+    return str(exe)
 
 def ensure_ffmpeg() -> str:
     path = shutil.which("ffmpeg")
     if path:
         return path
     system = platform.system()
+    local = BIN_DIR / ("ffmpeg.exe" if system == "Windows" else "ffmpeg")
+    if local.exists():
+        os.environ["PATH"] += os.pathsep + str(BIN_DIR)
+        return str(local)
     print("\n💡 ffmpeg not found – attempting automatic install …")
+    if system in ("Linux", "Windows"):
+        import http.client, tarfile, zipfile
+        try:
+            exe = install_static_ffmpeg(system)
+            if exe:
+                return exe
+        except (OSError, ValueError, EOFError, http.client.HTTPException, tarfile.TarError, zipfile.BadZipFile) as e:
+            print(f"   → static build failed: {e}")
     try:
         if system == "Linux" and shutil.which("apt-get"):
             subprocess.check_call(["sudo", "apt-get", "update", "-y"])
@@ -46,35 +272,160 @@ def ensure_ffmpeg() -> str:
         if system == "Darwin" and shutil.which("brew"):
             subprocess.check_call(["brew", "install", "ffmpeg"])
             return shutil.which("ffmpeg") or "ffmpeg"
-        if system == "Windows":
-            BIN_DIR.mkdir(exist_ok=True)
-            exe = BIN_DIR / "ffmpeg.exe"
-            if not exe.exists():
-                import urllib.request, zipfile, io, tempfile
-                url = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
-                print("   → downloading static build …")
-                with urllib.request.urlopen(url) as resp:
-                    with zipfile.ZipFile(io.BytesIO(resp.read())) as zf:
-                        member = [m for m in zf.namelist() if m.endswith("/bin/ffmpeg.exe")][0]
-                        with tempfile.TemporaryDirectory() as td:
-                            zf.extract(member, path=td)
-                            shutil.copy(Path(td) / member, exe)
-            os.environ["PATH"] += os.pathsep + str(BIN_DIR)
-            return str(exe)
     except subprocess.CalledProcessError:
         pass
     sys.exit(textwrap.dedent("""❌ Automatic ffmpeg installation failed."""))
 
-ensure_pip_package("yt-dlp")
-ensure_pip_package("colorama")
-update_yt_dlp()  # Update yt-dlp to handle YouTube changes
-auto_ffmpeg = ensure_ffmpeg()
+def _ffmpeg_table(ffmpeg: str, flag: str) -> list[str]:
+    """Names listed by `ffmpeg -encoders/-decoders/-muxers` (the column after the flags)"""
+    try:
+        out = subprocess.run([ffmpeg, "-hide_banner", flag], capture_output=True,
+                             text=True, errors="replace", timeout=30).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    names, in_table = [], False
+    for line in out.splitlines():
+        if not in_table:
+            in_table = line.strip().strip("-") == "" and line.strip() != ""
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            names.append(parts[1])
+    return names
+
+def _encoder_works(ffmpeg: str, encoder: str) -> bool:
+    # Hardware encoders are listed whenever ffmpeg was built with them, even without the device
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "lavfi",
+           "-i", "color=c=black:s=256x144:d=0.1", "-frames:v", "1",
+           "-c:v", encoder, "-f", "null", "-"]
+    try:
+        return subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=20) == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+def probe_ffmpeg(ffmpeg: str) -> dict:
+    try:
+        out = subprocess.run([ffmpeg, "-hide_banner", "-buildconf"], capture_output=True,
+                             text=True, errors="replace", timeout=30).stdout
+        version = subprocess.run([ffmpeg, "-version"], capture_output=True,
+                                 text=True, errors="replace", timeout=30).stdout.split()
+    except (OSError, subprocess.SubprocessError):
+        out, version = "", []
+    encoders = _ffmpeg_table(ffmpeg, "-encoders")
+    usable_hw = [e for e in H264_ENCODERS if e in HW_ENCODERS and e in encoders and _encoder_works(ffmpeg, e)]
+    return {
+        "version": version[2] if len(version) > 2 else "unknown",
+        "encoders": encoders,
+        "decoders": _ffmpeg_table(ffmpeg, "-decoders"),
+        "muxers": _ffmpeg_table(ffmpeg, "-muxers"),
+        "usable_hw_encoders": usable_hw,
+        "threads": "--disable-pthreads" not in out or "--enable-w32threads" in out,
+    }
+
+def ffmpeg_caps(ffmpeg: str | None = None) -> dict:
+    """Capabilities of the ffmpeg binary, probed once and cached on disk by path + mtime"""
+    ffmpeg = ffmpeg or auto_ffmpeg or "ffmpeg"
+    resolved = shutil.which(ffmpeg) or ffmpeg
+    try:
+        st = os.stat(resolved)
+        key = f"{os.path.realpath(resolved)}|{st.st_mtime_ns}|{st.st_size}"
+    except OSError:
+        return {"version": "unknown", "encoders": [], "decoders": [], "muxers": [],
+                "usable_hw_encoders": [], "threads": False}
+    if key in _ffmpeg_caps_memo:
+        return _ffmpeg_caps_memo[key]
+    cache = read_json(FFMPEG_CAPS_CACHE)
+    caps = cache.get(key)
+    if not caps:
+        caps = probe_ffmpeg(resolved)
+        cache = {k: v for k, v in cache.items() if not k.startswith(os.path.realpath(resolved) + "|")}
+        cache[key] = caps
+        write_json_atomic(FFMPEG_CAPS_CACHE, cache)
+    _ffmpeg_caps_memo[key] = caps
+    return caps
+
+def h264_encode_args(caps: dict | None = None) -> list[str] | None:
+    """`-c:v <fastest usable H.264 encoder> <quality args>`, or None if ffmpeg has none"""
+    caps = caps or ffmpeg_caps()
+    for enc, args in H264_ENCODERS.items():
+        if enc in HW_ENCODERS:
+            if enc in caps["usable_hw_encoders"]:
+                return ["-c:v", enc, *args]
+        elif enc in caps["encoders"]:
+            return ["-c:v", enc, *args]
+    return None
+
+def ffprobe_path() -> str | None:
+    """ffprobe from the same build as the ffmpeg in use, else from PATH"""
+    if auto_ffmpeg:
+        exe = Path(auto_ffmpeg)
+        sibling = exe.with_name(exe.name.replace("ffmpeg", "ffprobe"))
+        if sibling != exe and sibling.is_file():
+            return str(sibling)
+    return shutil.which("ffprobe")
+
+def probe_media(path: Path) -> dict:
+    """`ffprobe -show_streams -show_format` as a dict, {} if ffprobe is missing or fails"""
+    ffprobe = ffprobe_path()
+    if not ffprobe:
+        return {}
+    cmd = [ffprobe, "-v", "error", "-print_format", "json", "-show_streams", "-show_format", str(path)]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, errors="replace", timeout=60).stdout
+        return json.loads(out or "{}")
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return {}
+
+def keyframe_index(path: Path, origin: float = 0.0) -> tuple[list[tuple[float, int]], int]:
+    """(time, packet number) of each video keyframe plus the video packet count; times in
+    seconds from `origin` (the container start time), packet numbers in decode order"""
+    ffprobe = ffprobe_path()
+    if not ffprobe:
+        return [], 0
+    # Packet flags come from the demuxer, so nothing gets decoded
+    cmd = [ffprobe, "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(path)]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, errors="replace", timeout=600).stdout
+    except (OSError, subprocess.SubprocessError):
+        return [], 0
+    index, lines = [], out.splitlines()
+    for n, line in enumerate(lines):
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            index.append((float(pts) - origin, n))
+    return sorted(index), len(lines)
+
+def load_yt_dlp():
+    """Import yt_dlp on first use; safe to call from several threads"""
+    global yt_dlp, sanitize_filename
+    with _runtime_lock:
+        if yt_dlp is None:
+            import yt_dlp as _yt_dlp
+            from yt_dlp.utils import sanitize_filename as _sanitize_filename
+            sanitize_filename = _sanitize_filename
+            yt_dlp = _yt_dlp
+    return yt_dlp
+
+def _preload_yt_dlp() -> None:
+    try:
+        load_yt_dlp()
+    except Exception:
+        pass  # surfaced again by the foreground load_yt_dlp() call
 
-import yt_dlp
-from yt_dlp.utils import sanitize_filename
-from colorama import Fore, Style, init as colorama_init
+def bootstrap() -> None:
+    """Install/update dependencies and locate ffmpeg; must run before any download"""
+    global Fore, Style, auto_ffmpeg
+    ensure_pip_package("yt-dlp")
+    ensure_pip_package("colorama")
+    update_yt_dlp()  # Update yt-dlp to handle YouTube changes
+    auto_ffmpeg = ensure_ffmpeg()
 
-colorama_init(autoreset=True)
+    from colorama import Fore as _Fore, Style as _Style, init as colorama_init
+    colorama_init(autoreset=True)
+    Fore, Style = _Fore, _Style
+    # Import yt_dlp in the background while the user is typing the URL
+    threading.Thread(target=_preload_yt_dlp, daemon=True).start()
 
 def ask(prompt: str, choices: list[str]) -> str:
     while True:
@@ -97,146 +448,1565 @@ def unique_template(directory: Path, base: str, ext: str) -> str:
         suffix = f" ({n})"
     return str(directory / f"{base}{suffix}.%(ext)s")
 
-def main() -> None:
-    print(Fore.CYAN + "\n===   YouTube Downloader (yt-dlp)   ===\n")
+@dataclass
+class Job:
+    """One URL plus the choices main() would otherwise prompt for"""
+    url: str
+    is_audio: bool = False
+    audio_fmt: str = "mp3"
+    res: str = "auto"
+    start: str | None = None
+    end: str | None = None
+    items: list[int] | None = None  # 0-based indices into the accessible playlist entries, None = all
+    workers: int = DEFAULT_WORKERS
+    clips: list[tuple[str, str]] | None = None  # several start/end ranges cut from one download
+    clip_names: list[str] | None = None  # file stems for the clips, default <title>_<clip tag>
+    extra_fmts: list[str] | None = None  # more audio formats cut from the same download as audio_fmt
+    extra_res: list[str] | None = None  # smaller rungs of a resolution ladder topped by res
 
-    url = input("Paste YouTube URL: ").strip()
-    if not url:
-        sys.exit("❌ URL is required.")
+    @property
+    def audio_fmts(self) -> list[str]:
+        return [self.audio_fmt, *(self.extra_fmts or [])]
 
-    is_playlist = "list=" in url
-    download_all = True
-    selected_indices = []
+    @property
+    def resolutions(self) -> list[str]:
+        return [self.res, *(self.extra_res or [])]
 
-    if is_playlist:
+    @property
+    def variants(self) -> list[str]:
+        """Audio formats or resolutions this job writes a separate file for"""
+        return self.audio_fmts if self.is_audio else self.resolutions
+
+    def clip_tag(self, start: str | None, end: str | None, variant: str | None = None) -> str:
+        """`variant` is the one audio format / resolution of a multi-output job a file holds"""
+        tag = variant or "+".join(self.variants)
+        if start and end:
+            tag += f"_{start.replace(':', '').zfill(6)}-{end.replace(':', '').zfill(6)}"
+        return tag
+
+    @property
+    def quality_tag_base(self) -> str:
+        if self.clips:
+            return f"{self.clip_tag(None, None)}_{len(self.clips)}clips"
+        return self.clip_tag(self.start, self.end)
+
+AUDIO_FORMATS = ["mp3", "m4a", "opus"]
+# Streams already in the target codec are only remuxed by FFmpegExtractAudio, never re-encoded
+AUDIO_CODEC_FILTERS = {"mp3": "[acodec^=mp3]", "m4a": "[acodec^=mp4a]", "opus": "[acodec=opus]"}
+# Standard MP3 bitrates, and the average kbps of each LAME VBR level V0..V9
+MP3_BITRATES = [32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+MP3_VBR_KBPS = [245, 225, 190, 175, 165, 130, 115, 100, 85, 65]
+RESOLUTIONS = ["1080p", "720p", "480p", "360p", "auto"]
+
+def time_to_seconds(t: str) -> float:
+    secs = 0.0
+    for part in t.split(":"):
+        secs = secs * 60 + float(part)
+    return secs
+
+def normalize_time(t: str) -> str:
+    t = t.strip()
+    if len(t.split(":")) == 2:
+        t = "00:" + t
+    return t
+
+def set_clips(job: Job, clips: list[tuple[str, str]]) -> None:
+    """A single range is an ordinary start/end job; several become job.clips"""
+    if len(clips) == 1:
+        job.start, job.end = clips[0]
+    else:
+        job.clips = clips
+
+def parse_range(start: str, end: str) -> tuple[str, str]:
+    """Normalized (start, end); ValueError unless both are times and end comes after start"""
+    start, end = start.strip(), end.strip()
+    # float() alone would also take "-0:05", "1e1" or "inf"
+    if not all(re.fullmatch(r"\d+(:\d+){0,2}(\.\d+)?", t) for t in (start, end)):
+        raise ValueError(f"times must look like MM:SS or HH:MM:SS, got {start!r} and {end!r}")
+    start_s, end_s = time_to_seconds(start), time_to_seconds(end)
+    if start_s >= end_s:
+        raise ValueError(f"end must come after start, got {start!r} and {end!r}")
+    return normalize_time(start), normalize_time(end)
+
+def parse_clips(spec: str) -> list[tuple[str, str]]:
+    """`0:10-0:20,1:05-1:30` -> [("00:0:10", "00:0:20"), ("00:1:05", "00:1:30")]"""
+    clips = []
+    for part in spec.split(","):
+        start, sep, end = part.strip().partition("-")
+        if not (sep and start.strip() and end.strip()):
+            raise ValueError(f"clip must look like START-END, got {part.strip()!r}")
+        clips.append(parse_range(start, end))
+    return clips
+
+def set_audio_fmts(job: Job, raw: str) -> None:
+    """Apply a `mp3` or `mp3,opus` format choice; the first one names the download"""
+    fmts = list(dict.fromkeys(f.strip().lower() for f in raw.split(",") if f.strip()))
+    bad = [f for f in fmts if f not in AUDIO_FORMATS]
+    if bad or not fmts:
+        raise ValueError(f"format must be one or more of {', '.join(AUDIO_FORMATS)}")
+    job.audio_fmt, job.extra_fmts = fmts[0], fmts[1:] or None
+
+def set_resolutions(job: Job, raw: str) -> None:
+    """Apply a `720p` or `1080p,720p,360p` ladder choice; the highest rung names the download"""
+    ress = list(dict.fromkeys(r.strip().lower() for r in raw.split(",") if r.strip()))
+    if any(r not in RESOLUTIONS for r in ress) or not ress:
+        raise ValueError(f"res must be one or more of {', '.join(RESOLUTIONS)}")
+    if len(ress) > 1 and "auto" in ress:
+        raise ValueError("a resolution ladder needs explicit heights, not auto")
+    ress.sort(key=lambda r: -int(r[:-1]) if r != "auto" else 0)
+    job.res, job.extra_res = ress[0], ress[1:] or None
+
+def parse_job_line(line: str, defaults: dict | None = None) -> Job:
+    """`URL [mode=video|audio] [format=mp3[,opus,...]] [res=720p[,360p,...]] [start=MM:SS end=MM:SS | clips=MM:SS-MM:SS,...]
+    [items=1,3,5] [workers=N]`"""
+    parts = line.split()
+    opts = dict(defaults or {})
+    for part in parts[1:]:
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"expected key=value, got {part!r}")
+        opts[key.strip().lower()] = value.strip()
+    unknown = set(opts) - {"mode", "format", "res", "start", "end", "clips", "items", "workers"}
+    if unknown:
+        raise ValueError(f"unknown option(s): {', '.join(sorted(unknown))}")
+    mode = opts.get("mode", "video").lower()
+    if mode not in ("video", "audio"):
+        raise ValueError(f"mode must be video or audio, got {mode!r}")
+    job = Job(url=parts[0], is_audio=mode == "audio")
+    set_audio_fmts(job, opts.get("format", job.audio_fmt))
+    set_resolutions(job, opts.get("res", job.res))
+    if bool(opts.get("start")) != bool(opts.get("end")):
+        raise ValueError("start and end must be given together")
+    if opts.get("start"):
+        job.start, job.end = parse_range(opts["start"], opts["end"])
+    if opts.get("clips"):
+        if job.start:
+            raise ValueError("use either start/end or clips, not both")
+        if job.extra_fmts and job.is_audio:
+            raise ValueError("clips take a single audio format")
+        if job.extra_res and not job.is_audio:
+            raise ValueError("clips take a single resolution")
+        set_clips(job, parse_clips(opts["clips"]))
+    if opts.get("items"):
+        job.items = [int(x) - 1 for x in opts["items"].split(",") if x.strip().isdigit()]
+    if opts.get("workers"):
+        if not str(opts["workers"]).isdigit() or int(opts["workers"]) < 1:
+            raise ValueError("workers must be a positive integer")
+        job.workers = int(opts["workers"])
+    return job
+
+# Top-level info fields that are large and never needed to download or name a file
+HEAVY_INFO_KEYS = ("thumbnails", "automatic_captions", "subtitles", "heatmap", "description", "tags", "categories")
+# Fields that carry signed stream URLs and expire long before the rest of the info
+STREAM_INFO_KEYS = ("formats", "url", "manifest_url", "fragments", "fragment_base_url", "requested_formats", "http_headers")
+
+def stream_expiry(info: dict, fetched_at: float) -> float:
+    """Earliest expire= timestamp of any stream URL, else fetched_at + INFO_MAX_AGE"""
+    expiries = []
+    for f in info.get("formats") or [info]:
+        m = re.search(r"[?&/]expire[=/](\d+)", f.get("url") or "")
+        if m:
+            expiries.append(int(m.group(1)))
+    return min(expiries, default=fetched_at + INFO_MAX_AGE)
+
+class MetadataCache:
+    """SQLite cache of extracted info: stable fields (title, duration, ...) live for
+    META_STABLE_TTL, signed stream URLs only until they expire. Safe across threads and processes."""
+    def __init__(self, path: Path):
+        import sqlite3
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS videos (
+            key TEXT PRIMARY KEY, stable TEXT NOT NULL, streams TEXT,
+            fetched_at REAL NOT NULL, streams_expire REAL NOT NULL)""")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS playlists (
+            url TEXT PRIMARY KEY, info TEXT NOT NULL, fetched_at REAL NOT NULL)""")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS media (
+            path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+            info TEXT NOT NULL, indexed_at REAL NOT NULL)""")
+
+    def get_video(self, key: str, margin: float = 300) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT stable, streams, fetched_at, streams_expire FROM videos WHERE key = ?",
+                                   (key,)).fetchone()
+        if not row or time.time() - row[2] > META_STABLE_TTL:
+            return None
+        info = json.loads(row[0])
+        if row[1] and row[3] - time.time() > margin:
+            info.update(json.loads(row[1]))
+            info["_extracted_at"] = row[2]
+        else:
+            info["_extracted_at"] = 0  # stable fields only; download_info() re-extracts the streams
+        return info
+
+    def put_video(self, key: str, info: dict) -> None:
+        info = yt_dlp.YoutubeDL.sanitize_info(info)
+        fetched_at = time.time()
+        streams = {k: info.pop(k) for k in STREAM_INFO_KEYS if k in info}
+        for k in HEAVY_INFO_KEYS:
+            info.pop(k, None)
+        info.pop("_extracted_at", None)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?)",
+                             (key, json.dumps(info), json.dumps(streams), fetched_at,
+                              stream_expiry(streams, fetched_at)))
+
+    def get_playlist(self, url: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT info, fetched_at FROM playlists WHERE url = ?", (url,)).fetchone()
+        if not row or time.time() - row[1] > min(PLAYLIST_TTL, META_STABLE_TTL):
+            return None
+        return json.loads(row[0])
+
+    def put_playlist(self, url: str, info: dict) -> None:
+        info = yt_dlp.YoutubeDL.sanitize_info(info)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO playlists VALUES (?, ?, ?)",
+                             (url, json.dumps(info), time.time()))
+
+    def get_media(self, path: str, size: int, mtime_ns: int) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT info FROM media WHERE path = ? AND size = ? AND mtime_ns = ?",
+                                   (path, size, mtime_ns)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_media(self, path: str, size: int, mtime_ns: int, info: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?)",
+                             (path, size, mtime_ns, json.dumps(info), now))
+            # Clipped sources are usually deleted afterwards; don't let their indexes pile up
+            self._db.execute("DELETE FROM media WHERE indexed_at < ?", (now - MEDIA_INDEX_TTL,))
+
+class DownloadArchive:
+    """Index of finished downloads in an output folder:
+    (video key, mode, quality tag incl. time range) -> output path, size, sha256"""
+    FILENAME = ".ytdl-archive.sqlite3"
+
+    def __init__(self, out_dir: Path):
+        import sqlite3
+
+        self.out_dir = out_dir
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(out_dir / self.FILENAME), timeout=30,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS downloads (
+            key TEXT NOT NULL, mode TEXT NOT NULL, quality TEXT NOT NULL,
+            path TEXT NOT NULL, size INTEGER NOT NULL, sha256 TEXT NOT NULL, completed_at REAL NOT NULL,
+            PRIMARY KEY (key, mode, quality))""")
+
+    def lookup(self, key: str, mode: str, quality: str) -> Path | None:
+        """Output path of a finished download that is still on disk with its recorded size"""
+        with self._lock:
+            row = self._db.execute("SELECT path, size FROM downloads WHERE key = ? AND mode = ? AND quality = ?",
+                                   (key, mode, quality)).fetchone()
+        if not row:
+            return None
+        path = self.out_dir / row[0]
         try:
-            with yt_dlp.YoutubeDL({
-                "quiet": True, 
-                "extract_flat": True,
-                "ignore_errors": True,
-                "ignoreerrors": True
-            }) as ydl_info:
-                playlist_info = ydl_info.extract_info(url, download=False)
-        except Exception as e:
-            print(Fore.RED + f"❌ Failed to access playlist: {str(e)}")
-            print(Fore.CYAN + "💡 Try using a single video URL instead")
-            sys.exit(1)
-            
-        entries = playlist_info.get("entries", [])
-        # Count only accessible entries
-        accessible_entries = [e for e in entries if e is not None and e.get("title")]
-        
-        print(Fore.CYAN + f"\n📃 Detected playlist: {playlist_info.get('title', 'Untitled')} ({len(accessible_entries)} accessible videos)\n")
-        
-        if len(accessible_entries) == 0:
-            print(Fore.YELLOW + "⚠️ No accessible videos found in this playlist")
-            sys.exit(0)
-            
+            return path if path.stat().st_size == row[1] else None
+        except OSError:
+            return None
+
+    def record(self, key: str, mode: str, quality: str, path: Path) -> None:
+        import hashlib
+
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (key, mode, quality, path.name, path.stat().st_size, h.hexdigest(), time.time()))
+
+    def close(self) -> None:
+        self._db.close()
+
+class JobJournal:
+    """fsync'ed write-ahead log of entry states per output folder, so a re-run after a crash
+    knows where each entry stopped"""
+    FILENAME = ".ytdl-journal.jsonl"
+    IN_FLIGHT = ("extracting", "downloading", "post-processing")
+
+    def __init__(self, out_dir: Path, job_id: str):
+        self.path = out_dir / self.FILENAME
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        self.previous = self._load()  # entry key -> last state from an interrupted run of this job
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _load(self) -> dict[str, str]:
+        try:
+            text = self.path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return {}
+        records = []
+        for line in text.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # torn last line from a crash
+        # A torn tail has no newline; appending after it would glue the next record onto it
+        torn = len(records) < len(text.splitlines()) or (text and not text.endswith("\n"))
+        finished = {r["job"] for r in records if r.get("state") == "finished"}
+        live = [r for r in records if r.get("job") not in finished]
+        if len(live) < len(records) or torn:
+            # Compact: finished jobs are covered by the download archive, torn lines are dropped
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text("".join(json.dumps(r) + "\n" for r in live), encoding="utf-8")
+            os.replace(tmp, self.path)
+        return {r["key"]: r["state"] for r in live if r.get("job") == self.job_id and r.get("key")}
+
+    def mark(self, key: str | None, state: str) -> None:
+        line = json.dumps({"job": self.job_id, "key": key, "state": state, "t": round(time.time(), 3)})
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def finish(self) -> None:
+        self.mark(None, "finished")
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.close()
+
+def journaled(journal: JobJournal, state: str, func, last: bool = False):
+    """Wrap a pipeline stage so the journal records `state` before it runs and the outcome after"""
+    def run(task):
+        journal.mark(task.key, state)
+        try:
+            ok = func(task)
+        except BaseException:
+            journal.mark(task.key, "failed")
+            raise
+        if ok is False:
+            journal.mark(task.key, "failed")
+        elif last:
+            journal.mark(task.key, "done")
+        return ok
+    return run
+
+def job_id(job: Job) -> str:
+    import hashlib
+
+    mode = "audio" if job.is_audio else "video"
+    ident = f"{job.url}|{mode}|{job.quality_tag_base}|{job.items}"
+    if job.clips:
+        ident += f"|{job.clips}"
+    return hashlib.sha1(ident.encode()).hexdigest()[:16]
+
+_metadata_cache: MetadataCache | None = None
+
+def metadata_cache() -> MetadataCache | None:
+    """The shared metadata cache, or None when disabled (YTDL_META_TTL=0) or unusable"""
+    return _open_cache() if META_STABLE_TTL > 0 else None
+
+def media_cache() -> MetadataCache | None:
+    """The same database for media_index(), switched by YTDL_MEDIA_INDEX_TTL instead"""
+    return _open_cache() if MEDIA_INDEX_TTL > 0 else None
+
+def _open_cache() -> MetadataCache | None:
+    global _metadata_cache
+    with _runtime_lock:
+        if _metadata_cache is None:
+            try:
+                _metadata_cache = MetadataCache(METADATA_DB)
+            except Exception as e:
+                print(Fore.YELLOW + f"⚠️ Metadata cache disabled: {e}")
+                return None
+        return _metadata_cache
+
+def video_cache_key(url: str, ie_key: str | None = None) -> str | None:
+    """`<extractor>:<video id>` worked out from the URL alone (the URL itself for generic pages)"""
+    from yt_dlp.extractor import gen_extractor_classes, get_info_extractor
+
+    classes = [get_info_extractor(ie_key)] if ie_key else gen_extractor_classes()
+    for ie in classes:
+        if ie.suitable(url):
+            video_id = ie.get_temp_id(url) if ie.ie_key() != "Generic" else None
+            return f"{ie.ie_key()}:{video_id or url}"
+    return None
+
+def extract_playlist_flat(url: str) -> dict:
+    cache = metadata_cache()
+    cached = cache.get_playlist(url) if cache else None
+    if cached:
+        return cached
+    with yt_dlp.YoutubeDL({
+        "quiet": True, 
+        "extract_flat": True,
+        "ignore_errors": True,
+        "ignoreerrors": True
+    }) as ydl_info:
+        info = ydl_info.extract_info(url, download=False)
+    if cache and info and accessible_entries(info):
+        cache.put_playlist(url, info)
+    return info
+
+def accessible_entries(playlist_info: dict) -> list[dict]:
+    # Count only accessible entries
+    return [e for e in playlist_info.get("entries") or [] if e is not None and e.get("title")]
+
+def prompt_job(url: str, playlist_info: dict | None) -> Job:
+    job = Job(url=url)
+
+    if playlist_info is not None:
+        accessible = accessible_entries(playlist_info)
         choice = ask("Download semua atau pilih sebagian?", ["Semua video", "Pilih sebagian"])
         if choice.startswith("Pilih"):
-            download_all = False
             print("\nDaftar video yang dapat diakses dalam playlist:")
-            for i, entry in enumerate(accessible_entries, 1):
+            for i, entry in enumerate(accessible, 1):
                 print(f" {i}. {entry.get('title', 'Unknown Title')}")
-            raw = input(f"\nMasukkan nomor video yang ingin didownload (1-{len(accessible_entries)}, pisahkan dengan koma): ")
+            raw = input(f"\nMasukkan nomor video yang ingin didownload (1-{len(accessible)}, pisahkan dengan koma): ")
             try:
                 selected_indices = [int(x.strip()) - 1 for x in raw.split(",") if x.strip().isdigit()]
-                selected_indices = [i for i in selected_indices if 0 <= i < len(accessible_entries)]
+                selected_indices = [i for i in selected_indices if 0 <= i < len(accessible)]
                 if not selected_indices:
                     print(Fore.YELLOW + "⚠️ No valid selection made")
                     sys.exit(0)
             except Exception:
                 sys.exit("❌ Input tidak valid. Program dihentikan.")
+            job.items = selected_indices
 
     mode = ask("\nDownload what?", ["Video (mp4)", "Audio only"])
-    is_audio = mode.startswith("Audio")
-
-    if is_audio:
-        audio_fmt = ask("\nChoose audio format:", ["mp3", "m4a", "opus"])
-        quality_tag_base = audio_fmt
-        start, end = None, None
-        partial = ask("\nDownload full audio or just a section?", ["Full audio", "Specific time range"])
-        if partial.startswith("Specific"):
-            start = input("Enter start time (MM:SS or HH:MM:SS): ").strip()
-            end = input("Enter end time (MM:SS or HH:MM:SS): ").strip()
-            if len(start.split(":")) == 2:
-                start = "00:" + start
-            if len(end.split(":")) == 2:
-                end = "00:" + end
-            quality_tag_base += f"_{start.replace(':', '').zfill(6)}-{end.replace(':', '').zfill(6)}"
+    job.is_audio = mode.startswith("Audio")
+
+    if job.is_audio:
+        fmt = ask("\nChoose audio format:", [*AUDIO_FORMATS, "Several formats"])
+        while fmt == "Several formats":
+            try:
+                set_audio_fmts(job, input(f"Enter formats separated by commas (e.g. {AUDIO_FORMATS[0]},{AUDIO_FORMATS[-1]}): "))
+                break
+            except ValueError as e:
+                print(Fore.YELLOW + f"  ⚠️  {e}\n")
+        else:
+            job.audio_fmt = fmt
+        ranges = ["Full audio", "Specific time range"] + ([] if job.extra_fmts else ["Several time ranges"])
+        partial = ask("\nDownload full audio or just a section?", ranges)
     else:
-        res = ask("\nChoose video resolution:", ["1080p", "720p", "480p", "360p", "auto"])
-        quality_tag_base = res
-        start, end = None, None
-        partial = ask("\nDownload full video or just a section?", ["Full video", "Specific time range"])
-        if partial.startswith("Specific"):
-            start = input("Enter start time (MM:SS or HH:MM:SS): ").strip()
-            end = input("Enter end time (MM:SS or HH:MM:SS): ").strip()
-            if len(start.split(":")) == 2:
-                start = "00:" + start
-            if len(end.split(":")) == 2:
-                end = "00:" + end
-            quality_tag_base += f"_{start.replace(':', '').zfill(6)}-{end.replace(':', '').zfill(6)}"
+        res = ask("\nChoose video resolution:", [*RESOLUTIONS, "Resolution ladder"])
+        while res == "Resolution ladder":
+            try:
+                set_resolutions(job, input("Enter resolutions separated by commas (e.g. 1080p,720p,360p): "))
+                break
+            except ValueError as e:
+                print(Fore.YELLOW + f"  ⚠️  {e}\n")
+        else:
+            job.res = res
+        ranges = ["Full video", "Specific time range"] + ([] if job.extra_res else ["Several time ranges"])
+        partial = ask("\nDownload full video or just a section?", ranges)
+    if partial.startswith("Specific"):
+        start = input("Enter start time (MM:SS or HH:MM:SS): ")
+        end = input("Enter end time (MM:SS or HH:MM:SS): ")
+        try:
+            job.start, job.end = parse_range(start, end)
+        except ValueError as e:
+            sys.exit(f"❌ {e}")
+    elif partial.startswith("Several"):
+        raw = input("Enter ranges as START-END, separated by commas (e.g. 0:10-0:25,1:40-2:05): ")
+        try:
+            set_clips(job, parse_clips(raw))
+        except ValueError as e:
+            sys.exit(f"❌ {e}")
+    return job
 
-    # (⬇️⬇️⬇️ INI BAGIAN YANG DIMODIFIKASI UNTUK FOLDER KHUSUS PLAYLIST)
-    base_output = Path.cwd() / ("audio" if is_audio else "videos")
+class _ThreadBufferedStream:
+    """sys.stdout/sys.stderr proxy: writes from a capturing worker thread are held back
+    so each entry's output (including yt-dlp's) can be printed as one ordered block"""
+    def __init__(self, stream, local: threading.local):
+        self._stream = stream
+        self._local = local
 
-    if is_playlist:
-        playlist_title = sanitize_filename(playlist_info.get("title", "playlist"), restricted=True)
-        out_dir = base_output / playlist_title
-    else:
-        out_dir = base_output
+    def write(self, text: str) -> int:
+        chunks = getattr(self._local, "chunks", None)
+        if chunks is None:
+            return self._stream.write(text)
+        chunks.append((self._stream, text))
+        return len(text)
 
-    out_dir.mkdir(parents=True, exist_ok=True)
-    print(Fore.BLUE + f"\n📁 Output folder: {out_dir}\n")
+    def flush(self) -> None:
+        if getattr(self._local, "chunks", None) is None:
+            self._stream.flush()
 
-    # (⬇️ Ambil metadata semua video)
-    if not is_playlist:
+    def __getattr__(self, name: str):
+        if name == "buffer":
+            # yt-dlp writes bytes to .buffer when it exists, which would bypass the capture
+            raise AttributeError(name)
+        return getattr(self._stream, name)
+
+def run_pipeline(items: list, stages: list[tuple], queue_size: int = 4) -> list:
+    """Push items through `stages`, (func, threads) pairs joined by bounded queues; a func returning
+    False drops the item. Each item's output is buffered and printed in input order."""
+    import queue
+
+    if len(items) <= 1:
+        for item in items:
+            for func, _ in stages:
+                try:
+                    if func(item) is False:
+                        break
+                except Exception as e:
+                    print(Fore.RED + f"❌ Unexpected error: {e}")
+                    break
+        return items
+
+    local = threading.local()
+    chunks = [[] for _ in items]
+    finished = [threading.Event() for _ in items]
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]  # queues[i] feeds stage i
+    remaining = [threads for _, threads in stages]
+    count_lock = threading.Lock()
+
+    def worker(i: int) -> None:
+        func = stages[i][0]
+        while True:
+            idx = queues[i].get()
+            if idx is None:
+                break
+            local.chunks = chunks[idx]
+            try:
+                keep = func(items[idx]) is not False
+            except Exception as e:
+                print(Fore.RED + f"❌ Unexpected error: {e}")
+                keep = False
+            local.chunks = None
+            if keep and i + 1 < len(stages):
+                queues[i + 1].put(idx)
+            else:
+                finished[idx].set()
+        with count_lock:
+            remaining[i] -= 1
+            last = remaining[i] == 0
+        if last and i + 1 < len(stages):
+            for _ in range(stages[i + 1][1]):
+                queues[i + 1].put(None)
+
+    def feed() -> None:
+        for idx in range(len(items)):
+            queues[0].put(idx)
+        for _ in range(stages[0][1]):
+            queues[0].put(None)
+
+    real_out, real_err = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _ThreadBufferedStream(real_out, local), _ThreadBufferedStream(real_err, local)
+    threads = [threading.Thread(target=feed, daemon=True)]
+    threads += [threading.Thread(target=worker, args=(i,), daemon=True)
+                for i, (_, n) in enumerate(stages) for _ in range(n)]
+    try:
+        for t in threads:
+            t.start()
+        for idx in range(len(items)):
+            finished[idx].wait()
+            for stream, text in chunks[idx]:
+                stream.write(text)  # one write per chunk keeps colorama's autoreset per line
+            real_out.flush()
+            real_err.flush()
+        for t in threads:
+            t.join()
+    finally:
+        sys.stdout, sys.stderr = real_out, real_err
+    return items
+
+_ydl_local = threading.local()
+_ydl_instances: list = []
+_ydl_reuse: dict[str, bool] = {}
+_ydl_reuse_lock = threading.Lock()
+
+def _configure_ydl(ydl, defaults: dict, overrides: dict) -> None:
+    # Redo the parts of YoutubeDL.__init__ that depend on per-entry options
+    ydl.params.clear()
+    ydl.params.update(defaults)
+    ydl.params["outtmpl"] = {"default": overrides["outtmpl"]} if "outtmpl" in overrides else dict(defaults["outtmpl"])
+    ydl.params.update({k: v for k, v in overrides.items() if k != "outtmpl"})
+    ydl._parse_outtmpl()
+    fmt = ydl.params.get("format")
+    ydl.format_selector = fmt if fmt in (None, "-") or callable(fmt) else ydl.build_format_selector(fmt)
+    ydl._pps = {when: [] for when in ydl._pps}
+    for pp_def_raw in ydl.params.get("postprocessors", []):
+        pp_def = dict(pp_def_raw)
+        when = pp_def.pop("when", "post_process")
+        ydl.add_post_processor(yt_dlp.postprocessor.get_postprocessor(pp_def.pop("key"))(ydl, **pp_def), when=when)
+    ydl._download_retcode = 0
+
+def _ydl_state(ydl) -> tuple:
+    """What _configure_ydl() must reproduce: params, parsed outtmpl, postprocessors, format choice"""
+    info = {"id": "check", "title": "check", "extractor": "check", "extractor_key": "Check",
+            "webpage_url": "https://example.invalid/check", "formats": [
+                {"format_id": "a", "url": "https://example.invalid/a", "ext": "m4a",
+                 "vcodec": "none", "acodec": "mp4a.40.2", "abr": 128},
+                {"format_id": "v", "url": "https://example.invalid/v", "ext": "mp4",
+                 "vcodec": "avc1.4d401e", "acodec": "none", "height": 360}]}
+    chosen = ydl.process_ie_result(info, download=False)
+    return ({k: repr(v) for k, v in ydl.params.items()},
+            [f["format_id"] for f in chosen.get("requested_formats") or [chosen]],
+            {when: [type(pp).__name__ for pp in pps] for when, pps in ydl._pps.items()})
+
+def ydl_reuse_ok() -> bool:
+    """Whether _configure_ydl() reproduces a freshly built YoutubeDL on the installed yt-dlp
+    (it replays private internals); checked once per version, cached on disk"""
+    version = yt_dlp.version.__version__
+    with _ydl_reuse_lock:
+        if version in _ydl_reuse:
+            return _ydl_reuse[version]
+        cached = read_json(YDL_REUSE_CACHE)
+        if version not in cached:
+            base = {**base_ydl_opts(), "quiet": True, "noprogress": True}
+            first = {"format": "a", "outtmpl": "one.%(ext)s", "ignoreerrors": False,
+                     "postprocessors": [{"key": "FFmpegExtractAudio", "preferredcodec": "mp3"}]}
+            second = {"format": "v+a", "outtmpl": "two/%(title)s.%(ext)s", "ignoreerrors": False,
+                      "postprocessors": [{"key": "FFmpegMetadata"}]}
+            try:
+                with yt_dlp.YoutubeDL(dict(base)) as reused, yt_dlp.YoutubeDL({**base, **second}) as fresh:
+                    defaults = dict(reused.params, outtmpl=dict(reused.params["outtmpl"]))
+                    _configure_ydl(reused, defaults, first)
+                    _configure_ydl(reused, defaults, second)
+                    ok = _ydl_state(reused) == _ydl_state(fresh)
+            except Exception:
+                ok = False
+            if not ok:
+                print(Fore.YELLOW + f"⚠️ yt-dlp {version} can't be reconfigured in place; "
+                      "using a new YoutubeDL per entry")
+            cached = {version: ok}
+            write_json_atomic(YDL_REUSE_CACHE, cached)
+        _ydl_reuse[version] = cached[version]
+        return cached[version]
+
+def worker_ydl(ydl_opts_base: dict, overrides: dict):
+    """This thread's YoutubeDL reconfigured with one entry's overrides (errors raised, not ignored);
+    valid until the thread's next call"""
+    overrides = {**overrides, "ignoreerrors": False}
+    if not ydl_reuse_ok():
+        previous = getattr(_ydl_local, "fresh", None)
+        if previous is not None:
+            with _runtime_lock:
+                _ydl_instances.remove(previous)
+            previous.close()
+        ydl = _ydl_local.fresh = yt_dlp.YoutubeDL({**ydl_opts_base, **overrides})
+        with _runtime_lock:
+            _ydl_instances.append(ydl)
+        return ydl
+    ydl = getattr(_ydl_local, "ydl", None)
+    if ydl is None or _ydl_local.base is not ydl_opts_base:
+        ydl = yt_dlp.YoutubeDL(dict(ydl_opts_base))
+        _ydl_local.ydl, _ydl_local.base = ydl, ydl_opts_base
+        _ydl_local.defaults = dict(ydl.params, outtmpl=dict(ydl.params["outtmpl"]))
+        with _runtime_lock:
+            _ydl_instances.append(ydl)
+    _configure_ydl(ydl, _ydl_local.defaults, overrides)
+    return ydl
+
+def close_worker_ydls() -> None:
+    with _runtime_lock:
+        instances = list(_ydl_instances)
+        _ydl_instances.clear()
+    for ydl in instances:
+        ydl.close()
+    _ydl_local.ydl = _ydl_local.fresh = None
+
+def extract_raw(ydl, url: str, ie_key: str | None = None, use_cache: bool = True) -> dict | None:
+    """Extract without format selection (for a later process_ie_result()), metadata cache first;
+    a hit with expired stream URLs carries `_extracted_at: 0` so download_info() refreshes it"""
+    cache = metadata_cache()
+    key = video_cache_key(url, ie_key) if cache else None
+    if key and use_cache:
+        cached = cache.get_video(key)
+        if cached:
+            return cached
+    info = ydl.extract_info(url, download=False, process=False, ie_key=ie_key)
+    if info:
+        info["_extracted_at"] = time.time()
+        if key and info.get("_type", "video") == "video":
+            cache.put_video(key, info)
+    return info
+
+def info_is_fresh(info: dict, margin: float = 300) -> bool:
+    """False once `info` is older than INFO_MAX_AGE or a signed stream URL expires within `margin` s"""
+    now = time.time()
+    if now - info.get("_extracted_at", now) > INFO_MAX_AGE:
+        return False
+    for f in info.get("formats") or [info]:
+        m = re.search(r"[?&/]expire[=/](\d+)", f.get("url") or "")
+        if m and int(m.group(1)) - now < margin:
+            return False
+    return True
+
+def refresh_info(ydl, info: dict, video_url: str) -> dict:
+    """Re-extract `info` in place if its stream URLs went stale (or a cache hit carries none),
+    so a fallback attempt with the same dict doesn't extract again"""
+    if not info_is_fresh(info):
+        info.update(extract_raw(ydl, video_url, use_cache=False) or {})
+    return info
+
+def download_info(ydl, info: dict, video_url: str, download: bool = True) -> dict:
+    """Download from an already extracted info dict, re-extracting only if its URLs went stale.
+    With download=False only the format selection runs (see select_formats())."""
+    import copy
+
+    refresh_info(ydl, info, video_url)
+    # process_ie_result() annotates the dict; keep the caller's copy pristine for a fallback attempt
+    return ydl.process_ie_result(copy.deepcopy(info), download=download)
+
+def select_formats(ydl, info: dict, video_url: str) -> list[dict]:
+    """The formats ydl's format spec picks for `info`, one per stream to fetch"""
+    chosen = download_info(ydl, info, video_url, download=False)
+    return chosen.get("requested_formats") or [chosen]
+
+# yt-dlp codec strings -> the ffprobe names MP4_VIDEO_CODECS/MP4_AUDIO_CODECS use
+CODEC_FAMILIES = {"avc1": "h264", "avc3": "h264", "hev1": "hevc", "hvc1": "hevc", "vp09": "vp9",
+                  "av01": "av1", "mp4a": "aac", "mp4v": "mpeg4", "ac-3": "ac3", "ec-3": "eac3"}
+
+def codec_family(codec: str | None) -> str | None:
+    """ffprobe-style name of a yt-dlp codec string (avc1.64001f -> h264), None for none/unknown"""
+    if not codec or codec == "none":
+        return None
+    head = codec.split(".")[0].lower()
+    return CODEC_FAMILIES.get(head, head)
+
+def video_rank(f: dict, height: int) -> tuple:
+    """Sort key for a target height, best first: height fit, mp4 conversion cost, container,
+    bitrate, then smaller size"""
+    h = f.get("height") or 0
+    fit = (0, height - h) if h <= height else (1, h - height)
+    vcodec = codec_family(f.get("vcodec"))
+    conversion = 0 if vcodec == "h264" else 1 if vcodec in MP4_VIDEO_CODECS else 2
+    size = stream_bytes(f, 1.0)
+    return (*fit, conversion, f.get("ext") != "mp4", -(f.get("tbr") or 0), size, f["format_id"])
+
+def audio_rank(f: dict) -> tuple:
+    """Sort key of an audio-only format, best first: the original language track, AAC (fused
+    without conversion), other mp4-compatible codecs, m4a container, bitrate, smaller size"""
+    acodec = codec_family(f.get("acodec"))
+    conversion = 0 if acodec == "aac" else 1 if acodec in MP4_AUDIO_CODECS else 2
+    return (-(f.get("language_preference") or 0), conversion, f.get("ext") != "m4a",
+            -(f.get("abr") or f.get("tbr") or 0), stream_bytes(f, 1.0), f["format_id"])
+
+def format_plan(info: dict, res: str) -> list[dict]:
+    """Formats to fetch at `res` (video then audio, or one progressive format), ranked in-process
+    without a YoutubeDL selection run; [] when nothing usable is listed"""
+    usable = [f for f in info.get("formats") or [info]
+              if f.get("format_id") and (f.get("url") or f.get("fragments")) and not f.get("has_drm")]
+    videos, audios, progressive = [], [], []
+    for f in usable:
+        vcodec, acodec = f.get("vcodec"), f.get("acodec")
+        if vcodec == "none" and acodec not in (None, "none"):
+            audios.append(f)
+        elif vcodec not in (None, "none") and acodec == "none":
+            videos.append(f)
+        elif not (vcodec == "none" and acodec == "none"):
+            progressive.append(f)  # both codecs, or unknown ones: assume a muxed file
+    if res == "auto":
+        height = max((f.get("height") or 0 for f in videos + progressive), default=0)
+    else:
+        height = int(res[:-1])
+    rank = lambda f: video_rank(f, height)
+    best_video = min(videos, key=rank, default=None)
+    best_muxed = min(progressive, key=rank, default=None)
+    if best_video and not (best_muxed and rank(best_muxed)[:2] < rank(best_video)[:2]):
+        best_audio = min(audios, key=audio_rank, default=None)
+        return [best_video, best_audio] if best_audio else [best_video]
+    return [best_muxed] if best_muxed else []
+
+def resolve_entry(entry: dict, ydl_opts_base: dict) -> dict | None:
+    """Full info for a flat playlist entry, extracted on demand; None if it is unavailable"""
+    if entry.get("_type", "video") == "video" and entry.get("formats"):
+        return entry  # extractor already returned full info despite extract_flat
+    info = entry
+    for _ in range(3):  # follow url / url_transparent redirects
+        url = info.get("url") or info.get("webpage_url")
+        if not url:
+            break
         try:
-            with yt_dlp.YoutubeDL({"quiet": True}) as ydl_info:
-                info = ydl_info.extract_info(url, download=False)
-            entries = [info]
+            resolved = extract_raw(worker_ydl(ydl_opts_base, {}), url, ie_key=info.get("ie_key"))
         except Exception as e:
-            print(Fore.RED + f"❌ Failed to extract video info: {str(e)}")
-            sys.exit(1)
+            print(Fore.YELLOW + f"⚠️ Skipping unavailable video: {entry.get('title') or url} ({e})")
+            return None
+        if not resolved:
+            break
+        if info.get("_type") == "url_transparent":
+            resolved = {**resolved, **{k: v for k, v in info.items()
+                                       if k not in ("_type", "url", "ie_key") and v is not None}}
+        info = resolved
+        if info.get("_type", "video") == "video":
+            return info
+    print(Fore.YELLOW + f"⚠️ Skipping inaccessible video: {entry.get('title') or entry.get('url')}")
+    return None
+
+@dataclass
+class EntryTask:
+    """One playlist entry as it moves through the extract -> download -> post-process stages"""
+    entry: dict
+    info: dict | None = None
+    title: str = ""
+    base_name: str = ""
+    video_url: str = ""
+    success: bool = False
+    fallback: bool = False
+    key: str | None = None  # download archive key, see video_cache_key()
+    section: tuple[float, float] | None = None  # time range actually fetched, None = whole video
+    outputs: list[Path] = field(default_factory=list)  # clip files written for a multi-clip job
+    streams: list[Path] = field(default_factory=list)  # unmerged video/audio files, fused in post-processing
+    source: dict | None = None  # the selected audio format, sizes the bitrate of multi-format encodes
+    rungs: dict[str, list[Path]] = field(default_factory=dict)  # natively downloaded ladder rungs' streams
+    ladder: dict[str, str] = field(default_factory=dict)  # requested resolution -> rung that serves it
+
+def fetch_section(job: Job) -> tuple[float, float] | None:
+    """Time range to download for a clip: exact for audio, padded for video so the precise
+    cut (which may need the preceding keyframe) can be made locally"""
+    if job.clips:
+        # One fetch spanning every clip; the cuts are made locally
+        start = min(time_to_seconds(s) for s, _ in job.clips)
+        end = max(time_to_seconds(e) for _, e in job.clips)
+    elif job.start and job.end:
+        start, end = time_to_seconds(job.start), time_to_seconds(job.end)
     else:
-        try:
-            # Use ignore_errors to skip private/unavailable videos
-            with yt_dlp.YoutubeDL({
-                "quiet": True, 
-                "extract_flat": False,
-                "ignore_errors": True,
-                "ignoreerrors": True
-            }) as ydl_info:
-                full_info = ydl_info.extract_info(url, download=False)
-            all_entries = full_info.get("entries", [])
-            # Filter out None entries (failed extractions) and apply user selection
-            valid_entries = [e for e in all_entries if e is not None]
-            if not download_all:
-                # Map selected indices to valid entries only
-                entries = []
-                valid_index = 0
-                for i, entry in enumerate(all_entries):
-                    if entry is not None:
-                        if valid_index in selected_indices:
-                            entries.append(entry)
-                        valid_index += 1
+        return None
+    if job.is_audio:
+        return start, end
+    return max(0.0, start - SECTION_PAD), end + SECTION_PAD
+
+def audio_quality(audio_fmt: str, source: dict | None) -> str:
+    """Smallest standard bitrate (or LAME VBR level with YTDL_MP3_VBR) covering the source's abr,
+    capped at AUDIO_MAX_KBPS"""
+    abr = (source or {}).get("abr") or (source or {}).get("tbr") or AUDIO_MAX_KBPS
+    target = min(abr, AUDIO_MAX_KBPS) * 0.95  # reported abr runs a little over nominal (129.5 for a 128k stream)
+    if MP3_VBR and audio_fmt == "mp3":
+        # Values below 10 are passed through as -q:a; the lowest quality whose average still covers the target
+        return str(max((v for v, kbps in enumerate(MP3_VBR_KBPS) if kbps >= target), default=0))
+    return str(next((b for b in MP3_BITRATES if b >= target), MP3_BITRATES[-1]))
+
+def entry_ydl_opts(job: Job, outtmpl: str, section: tuple[float, float] | None = None,
+                   source: dict | None = None) -> dict:
+    """Per-entry overrides on top of ydl_opts_base; `source` is the already selected audio
+    format, which pins the download to it and sizes the transcode bitrate"""
+    ydl_opts = {"outtmpl": outtmpl}
+    if section:
+        # Only the bytes covering the section are fetched (ffmpeg seeks the remote stream)
+        ydl_opts["download_ranges"] = yt_dlp.utils.download_range_func(None, [section])
+
+    if job.is_audio:
+        # Prefer a stream one of the formats can copy, in the order the formats were asked for
+        preferred = "/".join(f"ba{AUDIO_CODEC_FILTERS[fmt]}" for fmt in job.audio_fmts)
+        ydl_opts["format"] = source["format_id"] if source else f"{preferred}/bestaudio/best"
+        if job.extra_fmts:
+            # The raw stream is kept; encode_audio_fmts() writes every format from it in one ffmpeg run
+            ydl_opts["postprocessors"] = []
+        else:
+            ydl_opts["postprocessors"] = [
+                {
+                    "key": "FFmpegExtractAudio",
+                    "preferredcodec": job.audio_fmt,
+                    "preferredquality": audio_quality(job.audio_fmt, source),
+                }
+            ]
+        if job.start and job.end and not section and not job.extra_fmts:
+            # Audio trimming can be done directly as postprocessor args
+            ydl_opts["postprocessor_args"] = ["-ss", job.start, "-to", job.end]
+    else:
+        # Only used when format_plan() finds nothing it can rank (e.g. an info without codecs)
+        h = "" if job.res == "auto" else f"[height<={job.res[:-1]}]"
+        # No merge/convert postprocessors: the streams are fetched separately and fused in one pass
+        ydl_opts["format"] = f"bv*{h}+ba/b{h}/bv*+ba/b"
+    return ydl_opts
+
+def media_index(path: Path) -> dict:
+    """Codecs, duration and keyframe index of a local file; cached by path + size + mtime so
+    cutting many clips from one source probes it once"""
+    st = path.stat()
+    key = str(path.resolve())
+    cache = media_cache()
+    index = cache.get_media(key, st.st_size, st.st_mtime_ns) if cache else None
+    if index is not None and "video_delay" in index:  # rows from before video_delay are re-probed
+        return index
+    info = probe_media(path)
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not s.get("disposition", {}).get("attached_pic")), {})  # cover art isn't video
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+    fmt = info.get("format", {})
+    keyframes, packets = keyframe_index(path, float(fmt.get("start_time") or 0)) if video else ([], 0)
+    index = {
+        "video_codec": video.get("codec_name"),
+        "pix_fmt": video.get("pix_fmt"),
+        "video_delay": int(video.get("has_b_frames") or 0),  # frames decode order runs ahead of display
+        "audio_codec": audio.get("codec_name"),
+        "duration": float(fmt.get("duration") or 0),
+        "keyframes": keyframes,
+        "packets": packets,
+    }
+    if cache and info:
+        cache.put_media(key, st.st_size, st.st_mtime_ns, index)
+    return index
+
+def frame_rate(index: dict, default: float = 30.0) -> float:
+    """Average video frame rate of a media_index() entry, `default` when the duration is unknown"""
+    return index["packets"] / index["duration"] if index["duration"] else default
+
+def write_mp4(cmd: list[str], dst: Path, seconds: float, fps: float = 30.0) -> bool:
+    """Finish an ffmpeg command with output `dst`, index up front via -moov_size (no second pass)"""
+    reserve = 16384 + int(seconds * (fps + 64) * 24)  # ~15 bytes per packet in practice
+    # +faststart rewrites the whole file, so it's only the fallback for a too-small reserve
+    for flags in (["-moov_size", str(reserve)], ["-movflags", "+faststart"]):
+        proc = subprocess.run([*cmd, *flags, str(dst)], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                              text=True, errors="replace")
+        # ffmpeg exits 0 even when the reserved space was too small, leaving a broken file
+        if "reserved_moov_size" not in proc.stderr:
+            return proc.returncode == 0 and dst.exists() and dst.stat().st_size > 1024
+    return False
+
+def smart_trim(src: Path, dst: Path, start: float, end: float, encode_args: list[str] | None,
+               audio_src: Path | None = None) -> bool:
+    """Frame-accurate cut copying the whole GOPs and re-encoding only the H.264 edges; False
+    when that isn't possible here, so the caller falls back to a plain cut"""
+    index = media_index(src)
+    if not index["video_codec"] or not index["keyframes"]:
+        return False
+    duration = index["duration"]
+    if duration:
+        end = min(end, duration)
+    keyframes = [tuple(k) for k in index["keyframes"]]
+    if duration and end >= duration - 0.001:
+        keyframes.append((duration, index["packets"]))  # the end of the file is a clean cut too
+    inner = [k for k in keyframes if start - 0.001 <= k[0] <= end + 0.001]
+    if len(inner) >= 2:
+        (first, first_n), (last, last_n) = inner[0], inner[-1]
+        segments = [("encode", start, first, 0)] if first - start > 0.001 else []
+        segments.append(("copy", first, last, last_n - first_n))
+        if end - last > 0.001:
+            segments.append(("encode", last, end, 0))
+    else:
+        # No whole GOP inside the range: the clip is short, encoding all of it is cheap
+        segments = [("encode", start, end, 0)]
+    if any(kind == "encode" for kind, *_ in segments) and not (encode_args and index["video_codec"] == "h264"):
+        return False
+
+    work_dir = dst.with_name(f".{dst.stem}.smart")
+    work_dir.mkdir(exist_ok=True)
+    try:
+        parts = []
+        for i, (kind, a, b, packets) in enumerate(segments):
+            part = work_dir / f"{i:02d}.mp4"
+            if kind == "copy":
+                # Seek a microsecond past the keyframe (ffprobe rounds its times) and take whole
+                # GOPs by packet count; time limits would cut the B-frame reordering tail
+                a += 0.000001
+                limit = ["-frames:v", str(packets), "-c:v", "copy"]
             else:
-                entries = valid_entries
-                
-            if not entries:
-                print(Fore.YELLOW + "⚠️ No accessible videos found in playlist")
-                sys.exit(0)
-                
-            print(Fore.CYAN + f"📋 Found {len(entries)} accessible video(s) to download")
+                limit = ["-t", f"{b - a:.6f}", *encode_args, "-pix_fmt", index["pix_fmt"] or "yuv420p"]
+            cmd = [auto_ffmpeg, "-y", "-v", "error", "-ss", f"{a:.6f}", "-i", str(src),
+                   "-map", "0:v:0", "-an", *limit, str(part)]
+            if subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) != 0:
+                return False
+            parts.append(part)
+        listing = work_dir / "parts.txt"
+        listing.write_text("".join(f"file '{p.name}'\n" for p in parts), encoding="utf-8")
+        cmd = [auto_ffmpeg, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", str(listing)]
+        audio_codec = media_index(audio_src)["audio_codec"] if audio_src else index["audio_codec"]
+        if audio_codec:
+            cmd += ["-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", str(audio_src or src),
+                    "-map", "0:v:0", "-map", "1:a:0", "-c:a", "copy" if audio_codec == "aac" else "aac"]
+        cmd += ["-c:v", "copy"]
+        return write_mp4(cmd, dst, end - start, frame_rate(index))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def cut_media(src: Path, dst: Path, start: float, end: float, allow_reencode: bool = True,
+              audio_src: Path | None = None) -> bool:
+    """Write src's start..end (plus audio_src's, when the audio is a separate file) to dst:
+    smart trim where possible, else a keyframe-snapped copy, else a full re-encode"""
+    encode_args = h264_encode_args() if allow_reencode else None
+    if smart_trim(src, dst, start, end, encode_args, audio_src):
+        return True
+    inputs = ["-ss", f"{start:.3f}", "-to", f"{end:.3f}", "-i", str(src)]
+    if audio_src:
+        inputs += ["-ss", f"{start:.3f}", "-to", f"{end:.3f}", "-i", str(audio_src),
+                   "-map", "0:v:0", "-map", "1:a:0"]
+    if write_mp4([auto_ffmpeg, "-y", "-v", "error", *inputs, "-c", "copy"], dst, end - start):
+        return True
+    # Retry without copy (re-encode) for keyframe mismatch
+    return bool(encode_args) and write_mp4([auto_ffmpeg, "-y", "-v", "error", *inputs, *encode_args, "-c:a", "aac"],
+                                           dst, end - start)
+
+def trim_video(out_dir: Path, base_name: str, start: str, end: str, allow_reencode: bool = True) -> bool:
+    """Cut the downloaded `base_name.*` to start..end in place as `base_name.mp4`"""
+    # Find the downloaded file (could be mp4/mkv/webm before convert)
+    downloaded_candidates = [p for p in out_dir.glob(f"{base_name}.*") if not p.name.endswith((".part", ".tmp.mp4"))]
+    if not downloaded_candidates:
+        return False
+    src_file = max(downloaded_candidates, key=lambda p: p.stat().st_mtime)
+    final_file = out_dir / f"{base_name}.mp4"
+    # Perform trim into a temp file then replace
+    trimmed_tmp = out_dir / f"{base_name}.clip.tmp.mp4"
+    if not cut_media(src_file, trimmed_tmp, time_to_seconds(start), time_to_seconds(end), allow_reencode):
+        return False
+    if final_file.exists():
+        final_file.unlink()
+    trimmed_tmp.rename(final_file)
+    # Optionally remove the original full file if different
+    if src_file.exists() and src_file != final_file:
+        try:
+            src_file.unlink()
+        except OSError:
+            pass
+    print(Fore.GREEN + f"✂️  Trimmed section saved: {final_file.name}")
+    return True
+
+# Codecs ffmpeg's mp4 muxer takes as-is; anything else has to be transcoded for an mp4 output
+MP4_VIDEO_CODECS = {"h264", "hevc", "av1", "vp9", "mpeg4"}
+MP4_AUDIO_CODECS = {"aac", "mp3", "opus", "flac", "alac", "ac3", "eac3"}
+conversion_stats = {"skipped": 0, "remuxed": 0, "transcoded": 0}
+_conversion_lock = threading.Lock()
+
+def mp4_conversion(video: Path, audio: Path | None) -> tuple[str, list[str]]:
+    """("skipped"|"remuxed"|"transcoded", codec args) to make one mp4 of the stream(s), copying
+    every stream the mp4 muxer accepts"""
+    vindex = media_index(video)
+    acodec = media_index(audio)["audio_codec"] if audio else vindex["audio_codec"]
+    video_ok = vindex["video_codec"] in MP4_VIDEO_CODECS
+    audio_ok = acodec is None or acodec in MP4_AUDIO_CODECS
+    if video_ok and audio_ok:
+        if not audio and video.suffix.lower() in (".mp4", ".m4v"):
+            return "skipped", []
+        return "remuxed", ["-c", "copy"]
+    video_args = ["-c:v", "copy"] if video_ok else h264_encode_args()
+    if not video_args:
+        raise RuntimeError(f"ffmpeg has no H.264 encoder to turn {vindex['video_codec']} video into mp4")
+    return "transcoded", [*video_args, "-c:a", "copy" if audio_ok else "aac"]
+
+def count_conversion(action: str) -> None:
+    with _conversion_lock:
+        conversion_stats[action] += 1
+
+def split_streams(streams: list[Path]) -> tuple[Path, Path | None]:
+    """(file with the video, separate audio file or None) among downloaded streams"""
+    video = next((p for p in streams if media_index(p)["video_codec"]), streams[0])
+    audio = next((p for p in streams if p != video and media_index(p)["audio_codec"]), None)
+    return video, audio
+
+def fuse_streams(streams: list[Path], dst: Path, start: float | None = None, end: float | None = None,
+                 allow_reencode: bool = True, cleanup: bool = True) -> bool:
+    """Merge + convert to mp4 + trim in one ffmpeg pass; cleanup=False leaves the inputs
+    (shared ladder audio) to the caller"""
+    video, audio = split_streams(streams)
+    tmp = dst.with_name(f"{dst.stem}.fuse.tmp.mp4")
+    if start is not None:
+        ok = cut_media(video, tmp, start, end, allow_reencode, audio)
+    else:
+        action, codec_args = mp4_conversion(video, audio)
+        count_conversion(action)
+        if action == "skipped":
+            if video != dst:
+                # Nothing to merge, convert or cut: no rewrite at all (a plain copy if others share it)
+                (os.replace if cleanup else shutil.copyfile)(video, dst)
+            return True
+        cmd = [auto_ffmpeg, "-y", "-v", "error", "-i", str(video)]
+        if audio:
+            cmd += ["-i", str(audio), "-map", "0:v:0", "-map", "1:a:0"]
+        index = media_index(video)
+        ok = write_mp4([*cmd, *codec_args], tmp, index["duration"] or 3 * 3600, frame_rate(index))
+    if not ok:
+        tmp.unlink(missing_ok=True)
+        return False
+    os.replace(tmp, dst)
+    for p in streams if cleanup else []:
+        if p != dst:
+            p.unlink(missing_ok=True)
+    return True
+
+def cut_clips(src: Path, clips: list[tuple[float, float, Path]], allow_reencode: bool = True,
+              audio_src: Path | None = None) -> list[Path]:
+    """Cut every (start, end, destination) out of `src` (audio from `audio_src` if separate) in
+    one ffmpeg run with per-clip seeked inputs; unaligned clips spanning GOPs go to smart_trim()"""
+    index = media_index(src)
+    keyframes = [k[0] for k in index["keyframes"]]
+    encode_args = h264_encode_args() if allow_reencode and index["video_codec"] else None
+    fps = frame_rate(index, 0)
+    trimmed, batch = [], []
+    for start, end, dst in clips:
+        aligned = any(abs(k - start) < 0.001 for k in keyframes)
+        spans_gops = sum(start < k < end for k in keyframes) >= 2
+        smart = index["video_codec"] and encode_args and not aligned and spans_gops
+        if smart and smart_trim(src, dst, start, end, encode_args, audio_src):
+            trimmed.append(dst)
+        else:
+            batch.append((start, end, dst, index["video_codec"] and not (encode_args and not aligned)))
+    if not batch:
+        return trimmed
+
+    cmd = [auto_ffmpeg, "-y", "-v", "error"]
+    for start, end, _, copy in batch:
+        if index["video_codec"]:
+            # Copied packets are cut by decode time, which runs ahead of display time by the
+            # reorder delay: end the video input that much earlier so the last frame is end's
+            video_end = end - index["video_delay"] / fps if copy and fps else end
+            cmd += ["-ss", f"{start:.3f}", "-to", f"{video_end:.3f}", "-i", str(src)]
+        cmd += ["-ss", f"{start:.3f}", "-to", f"{end:.3f}", "-i", str(audio_src or src)]
+    inputs = 2 if index["video_codec"] else 1
+    for i, (start, end, dst, copy) in enumerate(batch):
+        a = i * inputs + inputs - 1
+        if not index["video_codec"]:
+            cmd += ["-map", f"{a}:a:0", "-c", "copy", str(dst)]
+            continue
+        cmd += ["-map", f"{i * inputs}:v:0", "-map", f"{a}:a:0?"]
+        cmd += ["-c", "copy"] if copy else [*encode_args, "-c:a", "aac"]
+        cmd += ["-movflags", "+faststart", str(dst)]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="replace")
+    if proc.returncode != 0:
+        reason = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+        print(Fore.YELLOW + f"⚠️ ffmpeg failed cutting {len(batch)} clip(s) from {src.name}: {reason}")
+        for _, _, dst, _ in batch:
+            dst.unlink(missing_ok=True)  # possibly truncated; a re-run cuts them again
+        return trimmed
+    return trimmed + [dst for _, _, dst, _ in batch if dst.exists() and dst.stat().st_size > 1024]
+
+def stage_extract(task: EntryTask, job: Job, ydl_opts_base: dict) -> bool:
+    task.info = resolve_entry(task.entry, ydl_opts_base)
+    if not task.info:
+        return False
+    # Skip if entry doesn't have required info (private/unavailable)
+    task.video_url = task.info.get("webpage_url")
+    if not task.video_url:
+        print(Fore.YELLOW + f"⚠️ Skipping inaccessible video")
+        return False
+        
+    task.title = sanitize_filename(task.info.get("title", "video"), restricted=True)
+    if not task.title or task.title == "video":
+        print(Fore.YELLOW + f"⚠️ Skipping video with no title: {task.video_url}")
+        return False
+    task.base_name = f"{task.title}_{job.quality_tag_base}"
+    return True
+
+def download_streams(task: EntryTask, job: Job, out_dir: Path, ydl_opts_base: dict,
+                     section: tuple[float, float] | None = None) -> list[Path]:
+    """Fetch each format format_plan() picks to its own `<base>.f<id>.<ext>` file,
+    leaving merge/convert/trim to fuse_streams()"""
+    selected = plan_formats(task, job, out_dir, ydl_opts_base)
+    return [fetch_stream(task, f, out_dir, ydl_opts_base, section) for f in selected]
+
+def plan_formats(task: EntryTask, job: Job, out_dir: Path, ydl_opts_base: dict) -> list[dict]:
+    """format_plan() for the entry at job.res, falling back to yt-dlp's own selection"""
+    ydl = worker_ydl(ydl_opts_base, entry_ydl_opts(job, str(out_dir / f"{task.base_name}.%(ext)s")))
+    info = refresh_info(ydl, task.info, task.video_url)
+    return format_plan(info, job.res) or select_formats(ydl, info, task.video_url)
+
+def fetch_stream(task: EntryTask, f: dict, out_dir: Path, ydl_opts_base: dict,
+                 section: tuple[float, float] | None = None) -> Path:
+    """Download the single format `f` to `<base>.f<id>.<ext>`"""
+    fid = f["format_id"]
+    opts = {"outtmpl": str(out_dir / f"{task.base_name}.f{fid}.%(ext)s"), "format": fid}
+    if section:
+        opts["download_ranges"] = yt_dlp.utils.download_range_func(None, [section])
+    download_info(worker_ydl(ydl_opts_base, opts), task.info, task.video_url)
+    path = find_output(out_dir, f"{task.base_name}.f{fid}", f.get("ext") or "mp4")
+    if not path:
+        raise OSError(f"format {fid} was not written")
+    return path
+
+def encode_rate() -> float:
+    """Pixels per second the H.264 encoder is assumed to sustain (YTDL_ENCODE_MPIXELS overrides)"""
+    if ENCODE_MPIXELS:
+        return ENCODE_MPIXELS * 1e6
+    args = h264_encode_args() or []
+    if any(a in HW_ENCODERS for a in args):
+        return 400e6
+    return 25e6 * (os.cpu_count() or 1)  # libx264 -preset fast, roughly per core
+
+def stream_bytes(f: dict, duration: float) -> float:
+    return f.get("filesize") or f.get("filesize_approx") or (f.get("tbr") or 0) * 125 * duration
+
+def plan_ladder(task: EntryTask, job: Job, out_dir: Path, ydl_opts_base: dict,
+                section: tuple[float, float] | None = None) -> tuple[dict[str, list[dict] | None], dict[str, str]]:
+    """Formats to fetch per rung (None: scaled from the top rung) and the rung serving each
+    resolution, picking native downloads or one transcode by estimated wall time"""
+    import dataclasses
+
+    picks = {res: plan_formats(task, dataclasses.replace(job, res=res, extra_res=None), out_dir, ydl_opts_base)
+             for res in job.resolutions}
+
+    def video_of(fmts: list[dict]) -> dict:
+        return next((f for f in fmts if f.get("vcodec") not in (None, "none")), fmts[0])
+
+    groups = {}
+    for res in job.resolutions:
+        groups.setdefault(tuple(f["format_id"] for f in picks[res]), []).append(res)
+    served_by = {}
+    for same in groups.values():
+        # The rung whose height the formats really have, else the lowest (closest) label
+        exact = [res for res in same if video_of(picks[res]).get("height") == int(res[:-1])]
+        keep = exact[0] if exact else same[-1]
+        served_by.update(dict.fromkeys(same, keep))
+    rungs = [res for res in job.resolutions if served_by[res] == res]
+    for res, keep in served_by.items():
+        if keep != res:
+            print(Fore.YELLOW + f"⚠️ {res} is not offered; the {keep} rung covers it")
+    top_res, lower = rungs[0], rungs[1:]
+
+    known = section[1] - section[0] if section else task.info.get("duration")
+    duration = known or 1.0  # both costs scale with the duration, so the comparison holds without it
+    top = video_of(picks[top_res])
+    height = top.get("height") or int(top_res[:-1])
+    width = top.get("width") or height * 16 / 9
+    pixel_rate = width / height * (top.get("fps") or 30) * duration / encode_rate()
+    encode = {res: pixel_rate * min(int(res[:-1]), height) ** 2 for res in lower}
+    fetch = lambda fmts: sum(stream_bytes(f, duration) for f in fmts) / LADDER_BANDWIDTH
+
+    # Concurrent downloads share the link (YTDL_BANDWIDTH_MBPS); encodes cost CPU (YTDL_ENCODE_MPIXELS)
+    native = {res: picks[res] if video_of(picks[res]).get("height") == int(res[:-1]) else None
+              for res in lower}
+    transcode_cost = fetch(picks[top_res]) + sum(encode.values())
+    unique = {f["format_id"]: f for fmts in [picks[top_res], *native.values()] if fmts for f in fmts}
+    native_cost = (fetch(list(unique.values()))
+                   + sum(encode[res] for res, fmts in native.items() if not fmts))
+    use_native = any(native.values()) and native_cost < transcode_cost
+    estimate = f" (native ~{native_cost:.0f}s, transcode ~{transcode_cost:.0f}s)" if known else ""
+    print(Fore.CYAN + f"🪜 Ladder {'+'.join(rungs)}: "
+          f"{'native downloads' if use_native else 'one transcode' if lower else 'single download'}{estimate}")
+    return {top_res: picks[top_res], **(native if use_native else dict.fromkeys(lower))}, served_by
+
+def download_ladder(task: EntryTask, job: Job, out_dir: Path, ydl_opts_base: dict,
+                    section: tuple[float, float] | None = None) -> dict[str, list[Path]]:
+    """Fetch each format plan_ladder() picks once, concurrently; stream files per rung (top first),
+    with the serving rung of each resolution in task.ladder"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    plan, task.ladder = plan_ladder(task, job, out_dir, ydl_opts_base, section)
+    plan = {res: fmts for res, fmts in plan.items() if fmts}
+    unique = {f["format_id"]: f for fmts in plan.values() for f in fmts}
+    with ThreadPoolExecutor(max_workers=len(unique), thread_name_prefix="rung") as pool:
+        paths = dict(zip(unique, pool.map(lambda f: fetch_stream(task, f, out_dir, ydl_opts_base, section),
+                                          unique.values())))
+    return {res: [paths[f["format_id"]] for f in fmts] for res, fmts in plan.items()}
+
+def stage_download(task: EntryTask, job: Job, out_dir: Path, ydl_opts_base: dict) -> bool:
+    """Download with the requested format, falling back to a simpler one on SABR/format errors"""
+    outtmpl = str(out_dir / f"{task.base_name}.%(ext)s")
+    section = fetch_section(job)
+    print(f"🔽 Downloading: {task.title}")
+
+    def fetch(section):
+        if not job.is_audio and job.extra_res:
+            task.rungs = download_ladder(task, job, out_dir, ydl_opts_base, section)
+            task.streams = next(iter(task.rungs.values()))
+            outputs = list({p for streams in task.rungs.values() for p in streams})
+        elif not job.is_audio:
+            task.streams = download_streams(task, job, out_dir, ydl_opts_base, section)
+            outputs = task.streams
+        else:
+            source = select_formats(worker_ydl(ydl_opts_base, entry_ydl_opts(job, outtmpl)), task.info, task.video_url)[0]
+            download_info(worker_ydl(ydl_opts_base, entry_ydl_opts(job, outtmpl, section, source)),
+                          task.info, task.video_url)
+            task.source = source
+            outputs = [find_output(out_dir, task.base_name, job.audio_fmt if not job.extra_fmts else source.get("ext"))]
+        if section and not all(p and p.stat().st_size >= 1024 for p in outputs):
+            for p in outputs:
+                if p:
+                    p.unlink()
+            raise OSError("section download produced no media (server may not support range requests)")
+
+    try:
+        try:
+            fetch(section)
         except Exception as e:
-            print(Fore.RED + f"❌ Failed to extract playlist info: {str(e)}")
-            sys.exit(1)
+            error_msg = str(e).lower()
+            if not section or "sabr" in error_msg or "format" in error_msg:
+                raise
+            # Section fetches need ffmpeg to read the stream directly; fall back to full download + trim
+            print(Fore.YELLOW + f"⚠️ Section download failed, fetching the full video instead: {e}")
+            section = None
+            fetch(section)
+        task.success = True
+    except Exception as e:
+        error_msg = str(e).lower()
+        if "sabr" in error_msg or "format" in error_msg:
+            print(Fore.YELLOW + f"⚠️ SABR/Format issue detected for: {task.title}. Trying alternative method...")
+            task.streams, task.rungs, task.ladder = [], {}, {}
+            for leftover in out_dir.glob(f"{glob.escape(task.base_name)}.f*"):
+                leftover.unlink(missing_ok=True)  # half-fetched separate streams of the failed attempt
+            # Fallback: simpler format
+            ydl_opts_fallback = {"outtmpl": outtmpl}
+            ydl_opts_fallback["format"] = "b[height<=480]/b" if not job.is_audio else "bestaudio/best"
+            if section:
+                ydl_opts_fallback["download_ranges"] = yt_dlp.utils.download_range_func(None, [section])
+            elif job.is_audio and job.start and job.end:
+                ydl_opts_fallback["postprocessor_args"] = ["-ss", job.start, "-to", job.end]
+            try:
+                download_info(worker_ydl(ydl_opts_base, ydl_opts_fallback), task.info, task.video_url)
+                task.success = task.fallback = True
+            except Exception:
+                print(Fore.RED + f"❌ Download failed completely for: {task.title}")
+        else:
+            print(Fore.RED + f"❌ Download failed for: {task.title} - {str(e)}")
+    task.section = section
+    if not task.success:
+        print(Fore.CYAN + f"💡 You can try this URL manually: {task.video_url}")
+    return task.success
+
+def find_output(out_dir: Path, base_name: str, ext: str) -> Path | None:
+    """The finished file for `base_name`, preferring the expected extension"""
+    expected = out_dir / f"{base_name}.{ext}"
+    if expected.exists():
+        return expected
+    candidates = [p for p in out_dir.glob(f"{base_name}.*")
+                  if not p.name.endswith((".part", ".ytdl", ".tmp.mp4"))]
+    return max(candidates, key=lambda p: p.stat().st_mtime) if candidates else None
+
+def relative_range(task: EntryTask, start: str, end: str) -> tuple[float, float]:
+    """start..end in seconds into the fetched file, which begins at section[0] for a section download"""
+    offset = task.section[0] if task.section else 0.0
+    return time_to_seconds(start) - offset, time_to_seconds(end) - offset
+
+def record_outputs(archive: DownloadArchive | None, task: EntryTask, mode: str,
+                   outputs: list[tuple[str, Path]]) -> None:
+    """Note each (quality tag, file) in the download archive; a failure only costs the re-run skip"""
+    if not (archive and task.key):
+        return
+    for quality, dst in outputs:
+        try:
+            archive.record(task.key, mode, quality, dst)
+        except Exception as e:
+            print(Fore.YELLOW + f"⚠️ Could not record {dst.name} in the download archive: {e}")
+
+def stage_postprocess(task: EntryTask, job: Job, out_dir: Path, archive: DownloadArchive | None = None) -> bool:
+    ext = job.audio_fmt if job.is_audio else "mp4"
+    if job.clips:
+        return postprocess_clips(task, job, out_dir, ext, archive)
+    if job.is_audio and job.extra_fmts:
+        return postprocess_audio_fmts(task, job, out_dir, archive)
+    if not job.is_audio and job.extra_res:
+        return postprocess_ladder(task, job, out_dir, archive)
+    if task.streams:
+        start = end = None
+        if job.start and job.end:
+            start, end = relative_range(task, job.start, job.end)
+        try:
+            fused = fuse_streams(task.streams, out_dir / f"{task.base_name}.mp4", start, end, not task.fallback)
+        except Exception as e:
+            print(Fore.YELLOW + f"⚠️ Post-processing error: {e}")
+            fused = False
+        if not fused:
+            print(Fore.RED + f"❌ Could not merge the downloaded streams for: {task.title}")
+            return False
+        if start is not None:
+            print(Fore.GREEN + f"✂️  Trimmed section saved: {task.base_name}.mp4")
+    elif not job.is_audio and not (job.start and job.end):
+        # Fallback downloads are a single progressive file in whatever container the site offers
+        src = find_output(out_dir, task.base_name, "mp4")
+        try:
+            converted = not src or fuse_streams([src], out_dir / f"{task.base_name}.mp4")
+        except Exception as e:
+            print(Fore.YELLOW + f"⚠️ Post-processing error: {e}")
+            converted = False
+        if not converted:
+            print(Fore.YELLOW + f"⚠️ Could not convert {src.name} to mp4; keeping it as is.")
+    # After a successful download, perform the exact manual trim for video if requested
+    elif job.start and job.end and not job.is_audio:
+        start, end = job.start, job.end
+        if task.section:
+            start, end = (f"{t:.3f}" for t in relative_range(task, job.start, job.end))
+        try:
+            trimmed = trim_video(out_dir, task.base_name, start, end, allow_reencode=not task.fallback)
+            if not trimmed and not task.fallback:
+                print(Fore.YELLOW + "⚠️ Failed to trim with ffmpeg; keeping full file.")
+        except Exception as te:
+            print(Fore.YELLOW + f"⚠️ Trimming error: {te}")
+    if task.fallback:
+        print(Fore.GREEN + f"✅ Downloaded with fallback method: {task.title}")
+    else:
+        print(Fore.GREEN + f"✅ Successfully downloaded: {task.title}")
+    output = find_output(out_dir, task.base_name, ext)
+    if output:
+        record_outputs(archive, task, "audio" if job.is_audio else "video", [(job.quality_tag_base, output)])
+    return True
 
-    try_fragment_cut = bool(start and end)
-    default_ext = "mp4" if not is_audio else audio_fmt
+_cut_pool = None
 
-    ydl_opts_base = {
+def cut_pool():
+    """Shared executor for ffmpeg cut runs, one worker per CPU"""
+    global _cut_pool
+    from concurrent.futures import ThreadPoolExecutor
+
+    with _runtime_lock:
+        if _cut_pool is None:
+            _cut_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="cut")
+        return _cut_pool
+
+def postprocess_clips(task: EntryTask, job: Job, out_dir: Path, ext: str,
+                      archive: DownloadArchive | None = None) -> bool:
+    """Fan the single download of a multi-clip job out into one file per clip"""
+    src, audio_src = split_streams(task.streams) if task.streams else (find_output(out_dir, task.base_name, ext), None)
+    if not src:
+        print(Fore.RED + f"❌ Downloaded file not found for: {task.title}")
+        return False
+    names = job.clip_names or [f"{task.title}_{job.clip_tag(s, e)}" for s, e in job.clips]
+    clips = [(*relative_range(task, s, e), out_dir / f"{name}.{ext}") for (s, e), name in zip(job.clips, names)]
+    try:
+        media_index(src)  # probe once here rather than in every chunk
+        chunks = [clips[i:i + CLIPS_PER_FFMPEG] for i in range(0, len(clips), CLIPS_PER_FFMPEG)]
+        futures = [cut_pool().submit(cut_clips, src, chunk, not task.fallback, audio_src) for chunk in chunks]
+        outputs = [dst for f in futures for dst in f.result()]
+    except Exception as e:
+        print(Fore.YELLOW + f"⚠️ Clipping error: {e}; keeping full file.")
+        return True
+    if not outputs:
+        print(Fore.YELLOW + "⚠️ Failed to cut clips with ffmpeg; keeping full file.")
+        return True
+    task.outputs = outputs
+    if len(outputs) == len(clips):
+        # Kept otherwise, so a re-run can cut the missing clips without downloading again
+        for p in task.streams or [src]:
+            p.unlink(missing_ok=True)
+    print(Fore.GREEN + f"✂️  {len(outputs)}/{len(clips)} clip(s) saved from: {task.title}")
+    record_outputs(archive, task, "audio" if job.is_audio else "video",
+                   [(job.clip_tag(s, e), dst) for (s, e), (_, _, dst) in zip(job.clips, clips) if dst in outputs])
+    return len(outputs) == len(clips)
+
+# ffprobe codec name each audio format holds, and the encoders to try when the source differs
+AUDIO_FMT_CODECS = {"mp3": ("mp3", ("libmp3lame", "libshine")), "m4a": ("aac", ("aac",)),
+                    "opus": ("opus", ("libopus", "opus"))}
+
+def audio_encode_args(fmt: str, source: dict | None = None) -> list[str] | None:
+    """`-c:a <first encoder ffmpeg has for fmt> <rate args>`, or None if it has none"""
+    encoder = next((e for e in AUDIO_FMT_CODECS[fmt][1] if e in ffmpeg_caps()["encoders"]), None)
+    if not encoder:
+        return None
+    quality = int(audio_quality(fmt, source))
+    if quality < 10 and encoder == "libmp3lame":
+        rate = ["-q:a", str(quality)]
+    else:
+        rate = ["-b:a", f"{MP3_VBR_KBPS[quality] if quality < 10 else quality}k"]
+    # ffmpeg's native opus encoder is still flagged experimental
+    return ["-c:a", encoder, *rate, *(["-strict", "-2"] if encoder == "opus" else [])]
+
+def encode_audio_fmts(src: Path, outputs: list[tuple[str, Path]], start: float | None = None,
+                      end: float | None = None, source: dict | None = None) -> list[Path]:
+    """Write every (format, destination) from one audio file, copying where the codec matches"""
+    codec = media_index(src)["audio_codec"]
+    cmd = [auto_ffmpeg, "-y", "-v", "error"]
+    if start is not None:
+        cmd += ["-ss", f"{start:.3f}", "-to", f"{end:.3f}"]
+    cmd += ["-i", str(src)]
+    written = []
+    for fmt, dst in outputs:
+        codec_args = ["-c:a", "copy"] if codec == AUDIO_FMT_CODECS[fmt][0] else audio_encode_args(fmt, source)
+        if not codec_args:
+            print(Fore.YELLOW + f"⚠️ ffmpeg has no {fmt} encoder; skipping {dst.name}")
+            continue
+        cmd += ["-map", "0:a:0", *codec_args, str(dst)]
+        written.append(dst)
+    if not written:
+        return []
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="replace")
+    if proc.returncode != 0:
+        reason = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+        print(Fore.YELLOW + f"⚠️ ffmpeg failed converting {src.name}: {reason}")
+        for dst in written:
+            dst.unlink(missing_ok=True)  # possibly truncated; a re-run converts them again
+        return []
+    return [dst for dst in written if dst.exists() and dst.stat().st_size > 1024]
+
+def postprocess_audio_fmts(task: EntryTask, job: Job, out_dir: Path,
+                           archive: DownloadArchive | None = None) -> bool:
+    """Fan the single audio download of a multi-format job out into one file per format"""
+    src = find_output(out_dir, task.base_name, (task.source or {}).get("ext") or job.audio_fmt)
+    if not src:
+        print(Fore.RED + f"❌ Downloaded file not found for: {task.title}")
+        return False
+    start = end = None
+    if job.start and job.end:
+        start, end = relative_range(task, job.start, job.end)
+    targets = [(fmt, out_dir / f"{task.title}_{job.clip_tag(job.start, job.end, fmt)}.{fmt}") for fmt in job.audio_fmts]
+    try:
+        outputs = encode_audio_fmts(src, targets, start, end, task.source)
+    except Exception as e:
+        print(Fore.YELLOW + f"⚠️ Post-processing error: {e}")
+        outputs = []
+    if not outputs:
+        print(Fore.RED + f"❌ Could not convert the downloaded audio for: {task.title}")
+        return False
+    task.outputs = outputs
+    if len(outputs) == len(targets):
+        src.unlink(missing_ok=True)
+    print(Fore.GREEN + f"✅ {len(outputs)}/{len(targets)} format(s) saved from: {task.title}")
+    record_outputs(archive, task, "audio",
+                   [(job.clip_tag(job.start, job.end, fmt), dst) for fmt, dst in targets if dst in outputs])
+    return len(outputs) == len(targets)
+
+def scale_ladder(streams: list[Path], rungs: list[tuple[int, Path]], start: float | None = None,
+                 end: float | None = None) -> list[Path]:
+    """Scale the downloaded streams to every (height, destination) rung with one multi-output ffmpeg"""
+    video, audio = split_streams(streams)
+    encode_args = h264_encode_args()
+    if not encode_args:
+        print(Fore.RED + "❌ ffmpeg has no H.264 encoder; cannot scale the lower ladder rungs")
+        return []
+    acodec = media_index(audio or video)["audio_codec"]
+    audio_args = ["-c:a", "copy" if acodec in MP4_AUDIO_CODECS else "aac"]
+    seek = ["-ss", f"{start:.3f}", "-to", f"{end:.3f}"] if start is not None else []
+    cmd = [auto_ffmpeg, "-y", "-v", "error", *seek, "-i", str(video)]
+    if audio:
+        cmd += [*seek, "-i", str(audio)]
+    for height, dst in rungs:
+        cmd += ["-map", "0:v:0", "-map", "1:a:0" if audio else "0:a:0?",
+                "-vf", f"scale=-2:min({height}\\,ih)", *encode_args, "-pix_fmt", "yuv420p", *audio_args,
+                "-movflags", "+faststart", str(dst)]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="replace")
+    if proc.returncode != 0:
+        reason = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+        print(Fore.YELLOW + f"⚠️ ffmpeg failed scaling {len(rungs)} rung(s) from {video.name}: {reason}")
+        for _, dst in rungs:
+            dst.unlink(missing_ok=True)
+        return []
+    return [dst for _, dst in rungs if dst.exists() and dst.stat().st_size > 1024]
+
+def postprocess_ladder(task: EntryTask, job: Job, out_dir: Path,
+                       archive: DownloadArchive | None = None) -> bool:
+    """One mp4 per ladder rung: natively downloaded rungs are fused as usual, the others
+    scaled down from the top rung's streams in one multi-output ffmpeg run"""
+    found = find_output(out_dir, task.base_name, "mp4")
+    streams = task.streams or ([found] if found else [])
+    if not streams:
+        print(Fore.RED + f"❌ Downloaded file not found for: {task.title}")
+        return False
+    start = end = None
+    if job.start and job.end:
+        start, end = relative_range(task, job.start, job.end)
+    served_by = task.ladder or {res: res for res in job.resolutions}
+    targets = {res: out_dir / f"{task.title}_{job.clip_tag(job.start, job.end, res)}.mp4"
+               for res in job.resolutions if served_by[res] == res}
+    derived = [res for res in targets if res not in task.rungs]
+    outputs = []
+    try:
+        if derived:
+            # Before fusing, which may move the top rung's video into place
+            outputs += scale_ladder(streams, [(int(res[:-1]), targets[res]) for res in derived], start, end)
+        for res, rung_streams in task.rungs.items():
+            if fuse_streams(rung_streams, targets[res], start, end, not task.fallback, cleanup=False):
+                outputs.append(targets[res])
+    except Exception as e:
+        print(Fore.YELLOW + f"⚠️ Post-processing error: {e}")
+    if not outputs:
+        print(Fore.RED + f"❌ Could not produce any rung of the ladder for: {task.title}")
+        return False
+    task.outputs = [dst for dst in targets.values() if dst in outputs]
+    if len(outputs) == len(targets):
+        for p in {*streams, *(p for rung_streams in task.rungs.values() for p in rung_streams)}:
+            if p not in outputs:
+                p.unlink(missing_ok=True)
+    print(Fore.GREEN + f"✅ {len(outputs)}/{len(targets)} rung(s) saved from: {task.title}")
+    # Collapsed resolutions point at their serving rung, so re-runs skip them too
+    record_outputs(archive, task, "video", [(job.clip_tag(job.start, job.end, res), targets[rung])
+                                            for res, rung in served_by.items() if targets[rung] in outputs])
+    return len(outputs) == len(targets)
+
+def base_ydl_opts() -> dict:
+    """yt-dlp options shared by every download; per-entry choices go on top via worker_ydl()"""
+    return {
         "ffmpeg_location": auto_ffmpeg,
         "quiet": True,
         "ignore_errors": True,  # Skip individual video errors
@@ -248,174 +2018,141 @@ def main() -> None:
         "retry_sleep_functions": {"http": lambda n: 2 ** n},
         "sleep_interval_requests": 1,
         "sleep_interval_subtitles": 1,
+        "continuedl": True,  # resume .part files left by an interrupted run
     }
 
-    print("\n🔽️  Starting download …\n")
+def run_job(job: Job, playlist_info: dict | None = None) -> bool:
+    """Resolve and download everything a Job asks for; returns False if it could not start"""
+    is_playlist = "list=" in job.url
 
-    for entry in entries:
-        if not entry:
-            continue
-        
-        # Skip if entry doesn't have required info (private/unavailable)
-        video_url = entry.get("webpage_url")
-        if not video_url:
-            print(Fore.YELLOW + f"⚠️ Skipping inaccessible video")
-            continue
-            
-        title = sanitize_filename(entry.get("title", "video"), restricted=True)
-        if not title or title == "video":
-            print(Fore.YELLOW + f"⚠️ Skipping video with no title: {video_url}")
-            continue
-        base_name = f"{title}_{quality_tag_base}"
-        outtmpl = str(out_dir / f"{base_name}.%(ext)s")
-
-        ydl_opts = ydl_opts_base.copy()
-        ydl_opts["outtmpl"] = outtmpl
-
-        if is_audio:
-            ydl_opts.update({
-                "format": "bestaudio/best",
-                "postprocessors": [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": audio_fmt,
-                        "preferredquality": "192",
-                    }
-                ],
-            })
-            if try_fragment_cut:
-                # Audio trimming can be done directly as postprocessor args
-                ydl_opts["postprocessor_args"] = ["-ss", start, "-to", end]
-        else:
-            # Precise format selection for requested resolution
-            res_to_height = {"1080p": 1080, "720p": 720, "480p": 480, "360p": 360}
-            if res != "auto":
-                h = res_to_height.get(res, 1080)
-                fmt = (
-                    f"bv*[height={h}][vcodec~='(avc1|h264)']+ba[ext=m4a]/"  # exact height, common codec
-                    f"bv*[height={h}]+ba/"  # exact height any codec
-                    f"bv*[height<={h}][vcodec~='(avc1|h264)']+ba/"  # fallback <= height avc1
-                    f"bv*[height<={h}]+ba/"  # fallback <= height any
-                    f"b[height<={h}]"  # merged progressive
-                )
-            else:
-                fmt = "bv*+ba/b"  # best available
-            ydl_opts.update({
-                "format": fmt,
-                "merge_output_format": "mp4",
-                "postprocessors": [
-                    {"key": "FFmpegVideoConvertor", "preferedformat": "mp4"}
-                ],
-            })
-
-        print(f"🔽 Downloading: {title}")
-        success = False
-        
+    if is_playlist and playlist_info is None:
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl_each:
-                ydl_each.download([video_url])
-            success = True
-            # After successful full download, perform manual trim for video if requested
-            if success and try_fragment_cut and not is_audio:
-                try:
-                    # Find the downloaded file (could be mp4/mkv/webm before convert)
-                    downloaded_candidates = list(out_dir.glob(f"{base_name.split('_'+quality_tag_base)[0]}*{quality_tag_base}.*"))
-                    if not downloaded_candidates:
-                        downloaded_candidates = list(out_dir.glob(f"{base_name}.*"))
-                    if downloaded_candidates:
-                        src_file = max(downloaded_candidates, key=lambda p: p.stat().st_mtime)
-                        final_file = out_dir / f"{base_name}.mp4"
-                        if src_file != final_file:
-                            # ensure final file name matches expected pattern
-                            temp_input = src_file
-                        else:
-                            temp_input = src_file
-                        # Perform trim into a temp file then replace
-                        trimmed_tmp = out_dir / f"{base_name}.clip.tmp.mp4"
-                        cmd = [
-                            auto_ffmpeg,
-                            "-y",
-                            "-ss", start,
-                            "-to", end,
-                            "-i", str(temp_input),
-                            "-c", "copy",
-                            str(trimmed_tmp),
-                        ]
-                        rc = subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                        if rc != 0 or not trimmed_tmp.exists() or trimmed_tmp.stat().st_size < 1024:
-                            # Retry without copy (re-encode) for keyframe mismatch
-                            cmd = [
-                                auto_ffmpeg,
-                                "-y",
-                                "-ss", start,
-                                "-to", end,
-                                "-i", str(temp_input),
-                                "-c:v", "libx264",
-                                "-preset", "fast",
-                                "-crf", "18",
-                                "-c:a", "aac",
-                                str(trimmed_tmp),
-                            ]
-                            subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                        if trimmed_tmp.exists() and trimmed_tmp.stat().st_size > 1024:
-                            final_file = out_dir / f"{base_name}.mp4"
-                            if final_file.exists():
-                                final_file.unlink()
-                            trimmed_tmp.rename(final_file)
-                            # Optionally remove the original full file if different
-                            if src_file.exists() and src_file != final_file:
-                                try:
-                                    src_file.unlink()
-                                except OSError:
-                                    pass
-                            print(Fore.GREEN + f"✂️  Trimmed section saved: {final_file.name}")
-                        else:
-                            print(Fore.YELLOW + "⚠️ Failed to trim with ffmpeg; keeping full file.")
-                except Exception as te:
-                    print(Fore.YELLOW + f"⚠️ Trimming error: {te}")
-            print(Fore.GREEN + f"✅ Successfully downloaded: {title}")
+            playlist_info = extract_playlist_flat(job.url)
         except Exception as e:
-            error_msg = str(e).lower()
-            if "sabr" in error_msg or "format" in error_msg:
-                print(Fore.YELLOW + f"⚠️ SABR/Format issue detected for: {title}. Trying alternative method...")
-                # Fallback: simpler format
-                ydl_opts_fallback = ydl_opts_base.copy()
-                ydl_opts_fallback["outtmpl"] = outtmpl
-                ydl_opts_fallback["format"] = "b[height<=480]/b" if not is_audio else "bestaudio/best"
-                if is_audio and try_fragment_cut:
-                    ydl_opts_fallback["postprocessor_args"] = ["-ss", start, "-to", end]
-                try:
-                    with yt_dlp.YoutubeDL(ydl_opts_fallback) as ydl_fallback:
-                        ydl_fallback.download([video_url])
-                    success = True
-                    if success and try_fragment_cut and not is_audio:
-                        # Repeat trimming for fallback
-                        try:
-                            src_file = max(out_dir.glob(f"{base_name}.*"), key=lambda p: p.stat().st_mtime)
-                            trimmed_tmp = out_dir / f"{base_name}.clip.tmp.mp4"
-                            cmd = [auto_ffmpeg, "-y", "-ss", start, "-to", end, "-i", str(src_file), "-c", "copy", str(trimmed_tmp)]
-                            rc = subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                            if rc == 0 and trimmed_tmp.exists():
-                                final_file = out_dir / f"{base_name}.mp4"
-                                if final_file.exists():
-                                    final_file.unlink()
-                                trimmed_tmp.rename(final_file)
-                                if src_file.exists() and src_file != final_file:
-                                    try: src_file.unlink()
-                                    except OSError: pass
-                                print(Fore.GREEN + f"✂️  Trimmed section saved: {final_file.name}")
-                        except Exception:
-                            pass
-                    print(Fore.GREEN + f"✅ Downloaded with fallback method: {title}")
-                except Exception:
-                    print(Fore.RED + f"❌ Download failed completely for: {title}")
-            else:
-                print(Fore.RED + f"❌ Download failed for: {title} - {str(e)}")
-        
-        if not success:
-            print(Fore.CYAN + f"💡 You can try this URL manually: {video_url}")
+            print(Fore.RED + f"❌ Failed to access playlist: {str(e)}")
+            return False
+        if not playlist_info:
+            print(Fore.RED + f"❌ Failed to access playlist: {job.url}")
+            return False
+
+    # (⬇️⬇️⬇️ INI BAGIAN YANG DIMODIFIKASI UNTUK FOLDER KHUSUS PLAYLIST)
+    base_output = Path.cwd() / ("audio" if job.is_audio else "videos")
+
+    if is_playlist:
+        playlist_title = sanitize_filename(playlist_info.get("title", "playlist"), restricted=True)
+        out_dir = base_output / playlist_title
+    else:
+        out_dir = base_output
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    print(Fore.BLUE + f"\n📁 Output folder: {out_dir}\n")
+
+    ydl_opts_base = base_ydl_opts()
+
+    try:
+        archive = DownloadArchive(out_dir)
+    except Exception as e:
+        print(Fore.YELLOW + f"⚠️ Download archive disabled: {e}")
+        archive = None
+    mode = "audio" if job.is_audio else "video"
+
+    def already_done(key: str | None) -> Path | None:
+        if not (archive and key):
+            return None
+        if job.clips:
+            found = [archive.lookup(key, mode, job.clip_tag(s, e)) for s, e in job.clips]
+            return found[0] if all(found) else None
+        if len(job.variants) > 1:
+            found = [archive.lookup(key, mode, job.clip_tag(job.start, job.end, v)) for v in job.variants]
+            return found[0] if all(found) else None
+        return archive.lookup(key, mode, job.quality_tag_base)
+
+    # (⬇️ Ambil metadata semua video)
+    if not is_playlist:
+        key = video_cache_key(job.url)
+        done = already_done(key)
+        if done:
+            print(Fore.GREEN + f"⏭️  Already downloaded: {done.name}")
+            archive.close()
+            return True
+        try:
+            # Extracted once here; the download step reuses this info instead of extracting again
+            info = extract_raw(worker_ydl(ydl_opts_base, {}), job.url)
+            if not info:
+                raise ValueError("no video information returned")
+            entries = [info]
+            keys = [key]
+        except Exception as e:
+            close_worker_ydls()
+            if archive:
+                archive.close()
+            print(Fore.RED + f"❌ Failed to extract video info: {str(e)}")
+            return False
+    else:
+        # Reuse the flat listing; full info is resolved per selected entry by the workers
+        accessible = accessible_entries(playlist_info)
+        if job.items is not None:
+            entries = [accessible[i] for i in job.items if 0 <= i < len(accessible)]
+        else:
+            entries = accessible
+            
+        if not entries:
+            print(Fore.YELLOW + "⚠️ No accessible videos found in playlist")
+            if archive:
+                archive.close()
+            return True
+            
+        print(Fore.CYAN + f"📋 Found {len(entries)} accessible video(s) to download")
+
+        # Skip entries the archive already has before any extraction is scheduled
+        keys = [video_cache_key(e.get("url") or e.get("webpage_url") or "", e.get("ie_key"))
+                or e.get("url") or e.get("webpage_url") for e in entries]
+        pending = [(e, k) for e, k in zip(entries, keys) if not already_done(k)]
+        if len(pending) < len(entries):
+            print(Fore.GREEN + f"⏭️  Skipping {len(entries) - len(pending)} already downloaded video(s)")
+        entries, keys = [e for e, _ in pending], [k for _, k in pending]
+
+    journal = JobJournal(out_dir, job_id(job))
+    if journal.previous:
+        # Resume an interrupted run: drop finished entries, restart in-flight ones first
+        order = {k: i for i, k in enumerate(keys)}
+        pending = [(e, k) for e, k in zip(entries, keys) if journal.previous.get(k) != "done"]
+        pending.sort(key=lambda ek: (journal.previous.get(ek[1]) not in JobJournal.IN_FLIGHT, order[ek[1]]))
+        done_before = sum(1 for state in journal.previous.values() if state == "done")
+        print(Fore.CYAN + f"♻️  Resuming interrupted run: {done_before} done, {len(pending)} remaining")
+        entries, keys = [e for e, _ in pending], [k for _, k in pending]
+    for key in keys:
+        journal.mark(key, "queued")
+
+    workers = max(1, min(job.workers, len(entries)))
+    if len(entries) > 1:
+        ydl_opts_base["noprogress"] = True  # progress bars from parallel workers would interleave
+        print(Fore.CYAN + f"⚙️  Pipelining extraction, download and post-processing ({workers} worker(s) per stage)")
+
+    print("\n🔽️  Starting download …\n")
+
+    tasks = [EntryTask(entry, key=key) for entry, key in zip(entries, keys)]
+    conversions_before = dict(conversion_stats)
+    stages = [
+        (journaled(journal, "extracting", lambda t: stage_extract(t, job, ydl_opts_base)), workers),
+        (journaled(journal, "downloading", lambda t: stage_download(t, job, out_dir, ydl_opts_base)), workers),
+        (journaled(journal, "post-processing", lambda t: stage_postprocess(t, job, out_dir, archive), last=True),
+         max(1, min(workers, os.cpu_count() or 1))),
+    ]
+    try:
+        run_pipeline(tasks, stages, queue_size=2 * workers)
+        journal.finish()  # only reached when the run was not interrupted
+    finally:
+        journal.close()
+        close_worker_ydls()
+        if archive:
+            archive.close()
 
     print(Style.BRIGHT + f"\n✅ Download process completed! Check folder: {out_dir}")
+    conversions = {k: conversion_stats[k] - conversions_before[k] for k in conversion_stats}
+    if any(conversions.values()):
+        print(Fore.CYAN + f"🔁 mp4 conversion: {conversions['skipped']} skipped (already mp4), "
+              f"{conversions['remuxed']} remuxed, {conversions['transcoded']} transcoded")
     
     # Count successful downloads
     downloaded_files = list(out_dir.glob("*"))
@@ -436,6 +2173,254 @@ def main() -> None:
         print("   • Audio-only download")
         print("   • Try again later")
     print()
+    return True
+
+def run_batch(source: str, defaults: dict | None = None) -> int:
+    """Run every job listed in `source` (a file path, or "-" for stdin); returns the failure count"""
+    try:
+        fh = sys.stdin if source == "-" else open(source, encoding="utf-8")
+        with fh:
+            lines = fh.read().splitlines()
+    except (OSError, UnicodeError) as e:
+        print(Fore.RED + f"❌ Cannot read batch file {source}: {e}")
+        return 1
+
+    jobs = []
+    failed = 0  # unparsable lines count as failed jobs too
+    for lineno, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            jobs.append(parse_job_line(line, defaults))
+        except ValueError as e:
+            print(Fore.RED + f"❌ Line {lineno}: {e}")
+            failed += 1
+
+    load_yt_dlp()
+    for n, job in enumerate(jobs, 1):
+        print(Fore.CYAN + f"\n=== [{n}/{len(jobs)}] {job.url} ===")
+        try:
+            if not run_job(job):
+                failed += 1
+        except Exception as e:
+            print(Fore.RED + f"❌ Job failed: {job.url} - {e}")
+            failed += 1
+    print(Style.BRIGHT + f"\n📦 Batch finished: {len(jobs)} job(s) run, {failed} failed")
+    return failed
+
+MANIFEST_FIELDS = ["url", "start", "end", "label"]
+RESULT_FIELDS = ["row", *MANIFEST_FIELDS, "status", "output", "error"]
+
+def single_video_url(url: str) -> str | None:
+    """`url` without its playlist context (watch?v=A&list=PLx -> watch?v=A), so rows for
+    different videos of one playlist don't share a key; None for a URL naming only a playlist"""
+    from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if parts.path.rstrip("/").endswith("/playlist"):
+        return None
+    if not any(k == "list" for k, _ in query):
+        return url
+    names_video = (any(k == "v" for k, _ in query) or parts.netloc.endswith("youtu.be")
+                   or re.match(r"/(shorts|embed|live)/", parts.path))
+    if not names_video:
+        return None
+    query = [(k, v) for k, v in query if k not in ("list", "index", "pp", "start_radio")]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def read_manifest(source: str) -> list[dict]:
+    """Rows of a `url,start,end,label` CSV (header optional, label may be empty), each with
+    its row number and a status of "pending", or "failed" plus the reason if it is unusable"""
+    import csv
+
+    fh = sys.stdin if source == "-" else open(source, encoding="utf-8-sig", newline="")
+    with fh:
+        records = [r for r in csv.reader(fh) if any(cell.strip() for cell in r)]
+    if records and [c.strip().lower() for c in records[0][:2]] == MANIFEST_FIELDS[:2]:
+        records = records[1:]
+    rows = []
+    for n, record in enumerate(records, 1):
+        cells = [c.strip() for c in record] + [""] * len(MANIFEST_FIELDS)
+        row = dict(zip(MANIFEST_FIELDS, cells), row=n, status="pending", output="", error="")
+        try:
+            if not (row["url"] and row["start"] and row["end"]):
+                raise ValueError("url, start and end are required")
+            (row["start"], row["end"]), = parse_clips(f"{row['start']}-{row['end']}")
+            row["_video"] = single_video_url(row["url"])
+            if not row["_video"]:
+                raise ValueError("playlist URL; list each video on its own row")
+        except ValueError as e:
+            row.update(status="failed", error=str(e))
+        rows.append(row)
+    return rows
+
+def write_manifest_results(path: Path, rows: list[dict]) -> None:
+    import csv
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+def run_manifest(source: str, defaults: dict | None = None) -> int:
+    """Cut every manifest row, downloading each video once; writes per-row results next to the
+    manifest and returns the failed-row count"""
+    import csv
+
+    try:
+        rows = read_manifest(source)
+    except (OSError, UnicodeError, csv.Error) as e:
+        print(Fore.RED + f"❌ Cannot read manifest {source}: {e}")
+        return 1
+    try:
+        template = parse_job_line("manifest", defaults)  # mode/format/res shared by every row
+        if template.extra_fmts and template.is_audio:
+            raise ValueError("clips take a single audio format")
+        if template.extra_res and not template.is_audio:
+            raise ValueError("clips take a single resolution")
+    except ValueError as e:
+        print(Fore.RED + f"❌ Invalid manifest options: {e}")
+        return 1
+    load_yt_dlp()
+    mode = "audio" if template.is_audio else "video"
+    ext = template.audio_fmt if template.is_audio else "mp4"
+    out_dir = Path.cwd() / ("audio" if template.is_audio else "videos")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    print(Fore.BLUE + f"\n📁 Output folder: {out_dir}\n")
+    try:
+        archive = DownloadArchive(out_dir)
+    except Exception as e:
+        print(Fore.YELLOW + f"⚠️ Download archive disabled: {e}")
+        archive = None
+
+    groups: dict[str, list[dict]] = {}
+    used_names = set()
+    for row in rows:
+        if row["status"] != "pending":
+            continue
+        key = video_cache_key(row["_video"]) or row["_video"]
+        done = archive.lookup(key, mode, template.clip_tag(row["start"], row["end"])) if archive else None
+        if done:
+            row.update(status="skipped", output=done.name)
+            continue
+        if row["label"]:
+            name = sanitize_filename(row["label"], restricted=True) or f"clip{row['row']}"
+            if name in used_names:
+                name = f"{name}_{row['row']}"
+            used_names.add(name)
+            row["_name"] = name
+        groups.setdefault(key, []).append(row)
+
+    jobs, tasks = {}, []
+    for key, group in groups.items():
+        job = parse_job_line(group[0]["_video"], defaults)
+        job.clips = [(r["start"], r["end"]) for r in group]
+        if any("_name" in r for r in group):
+            job.clip_names = [r.get("_name") or f"clip{r['row']}" for r in group]
+        jobs[key] = job
+        tasks.append(EntryTask({"url": group[0]["_video"]}, key=key))
+    skipped = sum(r["status"] == "skipped" for r in rows)
+    print(Fore.CYAN + f"📋 {len(rows)} row(s): {sum(map(len, groups.values()))} clip(s) from "
+          f"{len(groups)} video(s) to cut, {skipped} already done")
+
+    ydl_opts_base = base_ydl_opts()
+    workers = max(1, min(template.workers, len(tasks) or 1))
+    if len(tasks) > 1:
+        ydl_opts_base["noprogress"] = True
+    stages = [
+        (lambda t: stage_extract(t, jobs[t.key], ydl_opts_base), workers),
+        (lambda t: stage_download(t, jobs[t.key], out_dir, ydl_opts_base), workers),
+        (lambda t: stage_postprocess(t, jobs[t.key], out_dir, archive), workers),
+    ]
+    try:
+        run_pipeline(tasks, stages, queue_size=2 * workers)
+    finally:
+        close_worker_ydls()
+        if archive:
+            archive.close()
+
+    for task in tasks:
+        job = jobs[task.key]
+        names = job.clip_names or [f"{task.title}_{job.clip_tag(s, e)}" for s, e in job.clips]
+        written = {p.name for p in task.outputs}
+        reason = ("video unavailable" if not task.info else "download failed" if not task.success
+                  else "cut failed")
+        for row, name in zip(groups[task.key], names):
+            if f"{name}.{ext}" in written:
+                row.update(status="done", output=f"{name}.{ext}")
+            else:
+                row.update(status="failed", error=reason)
+    for row in rows:
+        row.pop("_name", None)
+        row.pop("_video", None)
+
+    results = Path(source).with_suffix(".results.csv") if source != "-" else Path.cwd() / "manifest.results.csv"
+    write_manifest_results(results, rows)
+    failed = sum(r["status"] == "failed" for r in rows)
+    print(Style.BRIGHT + f"\n📦 Manifest finished: {sum(r['status'] == 'done' for r in rows)} cut, "
+          f"{skipped} skipped, {failed} failed → {results}")
+    return failed
+
+def parse_args(argv: list[str] | None = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="YouTube downloader (yt-dlp). Interactive unless --batch is given.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="non-interactive: read one 'URL [key=value ...]' job per line from FILE ('-' = stdin)")
+    parser.add_argument("--manifest", metavar="CSV",
+                        help="non-interactive: cut every url,start,end,label row of CSV ('-' = stdin), "
+                             "downloading each video once; results go to <CSV>.results.csv")
+    parser.add_argument("--mode", choices=["video", "audio"], help="default mode for batch lines")
+    parser.add_argument("--format", metavar="FMT[,FMT]",
+                        help=f"default audio format(s) for batch lines: {', '.join(AUDIO_FORMATS)}")
+    parser.add_argument("--res", metavar="RES[,RES]",
+                        help=f"default video resolution(s) for batch lines: {', '.join(RESOLUTIONS)}")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"parallel downloads per playlist (default {DEFAULT_WORKERS}, env YTDL_WORKERS)")
+    return parser.parse_args(argv)
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    bootstrap()
+
+    if args.batch or args.manifest:
+        defaults = {k: v for k, v in (("mode", args.mode), ("format", args.format), ("res", args.res)) if v}
+        defaults["workers"] = str(max(1, args.workers))
+        if args.manifest:
+            sys.exit(1 if run_manifest(args.manifest, defaults) else 0)
+        sys.exit(1 if run_batch(args.batch, defaults) else 0)
+
+    print(Fore.CYAN + "\n===   YouTube Downloader (yt-dlp)   ===\n")
+
+    url = input("Paste YouTube URL: ").strip()
+    if not url:
+        sys.exit("❌ URL is required.")
+    load_yt_dlp()
+
+    playlist_info = None
+    if "list=" in url:
+        try:
+            playlist_info = extract_playlist_flat(url)
+        except Exception as e:
+            print(Fore.RED + f"❌ Failed to access playlist: {str(e)}")
+            print(Fore.CYAN + "💡 Try using a single video URL instead")
+            sys.exit(1)
+            
+        accessible = accessible_entries(playlist_info)
+        print(Fore.CYAN + f"\n📃 Detected playlist: {playlist_info.get('title', 'Untitled')} ({len(accessible)} accessible videos)\n")
+        
+        if len(accessible) == 0:
+            print(Fore.YELLOW + "⚠️ No accessible videos found in this playlist")
+            sys.exit(0)
+
+    job = prompt_job(url, playlist_info)
+    job.workers = max(1, args.workers)
+    if not run_job(job, playlist_info):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()